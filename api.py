@@ -0,0 +1,335 @@
+from flask import Blueprint, current_app, request, jsonify, abort
+from flask.json.provider import DefaultJSONProvider
+from enums import GENRE_CODES, State
+from models import Venue, Artist
+from queries import (
+    VENUE_AREA_ORDER,
+    SHOW_ORDER,
+    venue_rows,
+    show_rows,
+    shows_data,
+    upcoming_shows,
+    past_shows,
+    detail_shows_data
+)
+from pagination import paginate
+from search import search
+from browse import browse_filters, browse_rows, facet_counts
+from matches import find_matches
+from cache import cache
+from conditional import (
+    conditional,
+    venues_state,
+    venue_state,
+    venue_matches_state,
+    artists_state,
+    artist_state,
+    artist_matches_state,
+    shows_state
+)
+from replicas import read_only
+from dates import format_datetimes
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used without it
+    orjson = None
+
+#----------------------------------------------------------------------------#
+# JSON.
+#----------------------------------------------------------------------------#
+
+class FastJSONProvider(DefaultJSONProvider):
+    """ Serializes with orjson when it is installed, falling back to the
+    stdlib encoder otherwise and for pretty-printed debug output. Keys stay
+    sorted either way, so equal payloads get equal ETags.
+    """
+    OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.OPTIONS).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+#----------------------------------------------------------------------------#
+# Blueprint.
+#----------------------------------------------------------------------------#
+
+# Read-only JSON views for API clients, validated like the pages they mirror
+# (see conditional.py): clients revalidating with If-None-Match get an empty
+# 304 instead of the payload, and the page cache keys entries by the ETag,
+# so no worker serves JSON older than the database. Responses without one
+# get a strong ETag over their body.
+api = Blueprint('api', __name__, url_prefix='/api')
+
+@api.after_request
+def add_etag(response):
+    if request.method == 'GET' and response.status_code == 200:
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+    return response
+
+def display_times(data):
+    """ Replace each show's start_time with the text the templates render
+    for it, formatted in one batch for the JSON consumers.
+    """
+    start_times = format_datetimes([show['start_time'] for show in data], 'full')
+    for show, start_time in zip(data, start_times):
+        show['start_time'] = start_time
+    return data
+
+def page_response(page, data):
+    return jsonify({"data": data, "next": page.next_cursor})
+
+def matches_response(model, entity_id):
+    data = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "state": row.state,
+            "genres": row.genres,
+            "num_upcoming_shows": row.num_upcoming_shows,
+            "shared_genres": row.shared,
+        }
+        for row in find_matches(model, entity_id)
+    ]
+    return jsonify({"data": data})
+
+def browse(model):
+    """ A page of the venues/artists matching ?genre= (repeatable, all must
+    match), ?state= and ?seeking=, with the match count and its breakdown
+    by genre and state.
+    """
+    genres = request.args.getlist('genre')
+    for genre in genres:
+        if genre not in GENRE_CODES:
+            abort(400, f'Unknown genre {genre!r}.')
+    state = request.args.get('state')
+    if state and state not in State.__members__:
+        abort(400, f'Unknown state {state!r}.')
+    seeking = request.args.get('seeking')
+    if seeking is not None:
+        seeking = seeking.lower() in ('1', 'true', 'yes')
+
+    filters = browse_filters(model, genres, state, seeking)
+    page = paginate(browse_rows(model, filters), [model.id])
+    count, facets = facet_counts(model, filters)
+    data = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "state": row.state,
+            "genres": row.genres,
+            "num_upcoming_shows": row.num_upcoming_shows,
+        }
+        for row in page.items
+    ]
+    return jsonify({"data": data, "next": page.next_cursor, "count": count, "facets": facets})
+
+#  Venues
+#  ----------------------------------------------------------------
+@api.route('/venues')
+@conditional(venues_state)
+@cache.page('venues')
+def venues():
+    page = paginate(venue_rows(), VENUE_AREA_ORDER)
+    data = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "state": row.state,
+            "num_upcoming_shows": row.num_upcoming_shows,
+        }
+        for row in page.items
+    ]
+    return page_response(page, data)
+
+@api.route('/venues/search')
+@conditional(venues_state)
+@cache.page('venues')
+def search_venues():
+    return jsonify(search(Venue, request.args.get('q', ''), genre=request.args.get('genre')))
+
+@api.route('/venues/browse')
+@conditional(venues_state)
+@cache.page('venues')
+def browse_venues():
+    return browse(Venue)
+
+@api.route('/venues/<int:venue_id>')
+@conditional(venue_state)
+@cache.page('venue:{venue_id}')
+def venue(venue_id):
+    venue = Venue.query.get_or_404(venue_id)
+    return jsonify({
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website_link,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows_count": venue.past_shows_count,
+        "upcoming_shows_count": venue.upcoming_shows_count,
+    })
+
+@api.route('/venues/<int:venue_id>/upcoming_shows')
+@conditional(venue_state)
+@cache.page('venue:{venue_id}')
+def venue_upcoming_shows(venue_id):
+    page = paginate(*upcoming_shows('venue', venue_id))
+    for row in page.items:
+        cache.tag(f'artist:{row.artist_id}')
+    return page_response(page, display_times(detail_shows_data(page.items, 'artist')))
+
+@api.route('/venues/<int:venue_id>/matches')
+@conditional(venue_matches_state)
+@cache.page('venue:{venue_id}', 'artists')
+def venue_matches(venue_id):
+    Venue.query.get_or_404(venue_id)
+    return matches_response(Venue, venue_id)
+
+@api.route('/venues/<int:venue_id>/past_shows')
+@conditional(venue_state)
+@cache.page('venue:{venue_id}')
+def venue_past_shows(venue_id):
+    page = paginate(*past_shows('venue', venue_id), descending=True)
+    for row in page.items:
+        cache.tag(f'artist:{row.artist_id}')
+    return page_response(page, display_times(detail_shows_data(page.items, 'artist')))
+
+#  Artists
+#  ----------------------------------------------------------------
+@api.route('/artists')
+@conditional(artists_state)
+@cache.page('artists')
+def artists():
+    page = paginate(Artist.query.with_entities(Artist.id, Artist.name), [Artist.id])
+    data = [{"id": row.id, "name": row.name} for row in page.items]
+    return page_response(page, data)
+
+@api.route('/artists/search')
+@conditional(artists_state)
+@cache.page('artists')
+def search_artists():
+    return jsonify(search(Artist, request.args.get('q', ''), genre=request.args.get('genre')))
+
+@api.route('/artists/browse')
+@conditional(artists_state)
+@cache.page('artists')
+def browse_artists():
+    return browse(Artist)
+
+@api.route('/artists/<int:artist_id>')
+@conditional(artist_state)
+@cache.page('artist:{artist_id}')
+def artist(artist_id):
+    artist = Artist.query.get_or_404(artist_id)
+    return jsonify({
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website_link,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows_count": artist.past_shows_count,
+        "upcoming_shows_count": artist.upcoming_shows_count,
+    })
+
+@api.route('/artists/<int:artist_id>/upcoming_shows')
+@conditional(artist_state)
+@cache.page('artist:{artist_id}')
+def artist_upcoming_shows(artist_id):
+    page = paginate(*upcoming_shows('artist', artist_id))
+    for row in page.items:
+        cache.tag(f'venue:{row.venue_id}')
+    return page_response(page, display_times(detail_shows_data(page.items, 'venue')))
+
+@api.route('/artists/<int:artist_id>/matches')
+@conditional(artist_matches_state)
+@cache.page('artist:{artist_id}', 'venues')
+def artist_matches(artist_id):
+    Artist.query.get_or_404(artist_id)
+    return matches_response(Artist, artist_id)
+
+@api.route('/artists/<int:artist_id>/past_shows')
+@conditional(artist_state)
+@cache.page('artist:{artist_id}')
+def artist_past_shows(artist_id):
+    page = paginate(*past_shows('artist', artist_id), descending=True)
+    for row in page.items:
+        cache.tag(f'venue:{row.venue_id}')
+    return page_response(page, display_times(detail_shows_data(page.items, 'venue')))
+
+#  Shows
+#  ----------------------------------------------------------------
+@api.route('/shows')
+@conditional(shows_state)
+@cache.page('shows')
+def shows():
+    page = paginate(show_rows(), SHOW_ORDER)
+    return page_response(page, display_times(shows_data(page.items)))
+
+@api.route('/shows/validate', methods=['POST'])
+@read_only
+def validate_tour():
+    """ Check a proposed tour, {"shows": [{"artist_id", "venue_id",
+    "start_time", "duration"}, ...]}, without booking it: every show is
+    validated like an import row, against the existing bookings and the
+    earlier shows of the tour. Errors are keyed by position in the list.
+    """
+    from bulk import KINDS, validate, check_shows
+    model, form_class, fields = KINDS['shows']
+
+    payload = request.get_json(silent=True)
+    shows = payload.get('shows') if isinstance(payload, dict) else None
+    if not isinstance(shows, list):
+        abort(400, 'Expected {"shows": [...]}.')
+    if len(shows) > current_app.config['TOUR_LIMIT']:
+        abort(400, f"At most {current_app.config['TOUR_LIMIT']} shows per tour.")
+
+    rows, rejected = [], []
+    for index, record in enumerate(shows):
+        if not isinstance(record, dict):
+            rejected.append((index, {'record': ['Expected an object.']}))
+            continue
+        values, errors = validate(form_class, fields, record)
+        if errors:
+            rejected.append((index, errors))
+        else:
+            rows.append((index, values))
+    accepted, conflicts = check_shows(rows)
+    rejected = sorted(rejected + conflicts, key=lambda item: item[0])
+
+    return jsonify({
+        "valid": not rejected,
+        "errors": [{"index": index, "errors": errors} for index, errors in rejected],
+    })
+
+#  Errors
+#  ----------------------------------------------------------------
+@api.errorhandler(400)
+@api.errorhandler(404)
+def error(error):
+    return jsonify({"error": error.description}), error.code
@@ -0,0 +1,217 @@
+from flask import (
+    Blueprint,
+    current_app,
+    render_template,
+    request,
+    flash,
+    redirect,
+    url_for,
+    abort
+)
+from models import Artist, db
+from queries import upcoming_shows, past_shows, detail_shows_data
+from pagination import paginate
+from search import search
+from cache import cache
+from replicas import read_only
+from matches import reindex
+from deletes import delete, invalidate
+from conditional import conditional, artists_state, artist_state, touch_counterparts, bump_listings
+
+#----------------------------------------------------------------------------#
+# Blueprint.
+#----------------------------------------------------------------------------#
+
+# Forms are imported inside the views that use them; WTForms is only
+# loaded once somebody opens a form.
+bp = Blueprint('artists', __name__, url_prefix='/artists')
+
+#  Artists List
+#  ----------------------------------------------------------------
+@bp.route('')
+@conditional(artists_state)
+@cache.page('artists')
+def artists():
+    page = paginate(Artist.query.with_entities(Artist.id, Artist.name), [Artist.id])
+    return render_template('pages/artists.html', artists=page.items, page=page)
+
+#  Artists Search
+#  ----------------------------------------------------------------
+@bp.route('/search', methods=['POST'])
+@read_only
+def search_artists():
+    search_term = request.form.get('search_term', '')
+    genre = request.form.get('genre')
+    response = search(Artist, search_term, genre=genre)
+
+    return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+#  Detail Artist
+#  ----------------------------------------------------------------
+@bp.route('/<int:artist_id>')
+@conditional(artist_state)
+@cache.page('artist:{artist_id}')
+def show_artist(artist_id):
+    artist = Artist.query.get_or_404(artist_id)
+
+    # Only the first few shows of each section; the rest are fetched from
+    # the JSON endpoints below as the visitor asks for them.
+    limit = current_app.config['SHOW_SECTION_SIZE']
+    upcoming = paginate(*upcoming_shows('artist', artist_id), after='', limit=limit)
+    past = paginate(*past_shows('artist', artist_id), after='', limit=limit, descending=True)
+
+    for row in upcoming.items + past.items:
+        cache.tag(f'venue:{row.venue_id}')
+
+    # object class to dict
+    data = vars(artist)
+    data['website'] = data['website_link']
+
+    data['past_shows'] = detail_shows_data(past.items, 'venue')
+    data['upcoming_shows'] = detail_shows_data(upcoming.items, 'venue')
+    data['past_shows_count'] = artist.past_shows_count
+    data['upcoming_shows_count'] = artist.upcoming_shows_count
+
+    return render_template('pages/show_artist.html', artist=data, upcoming=upcoming, past=past)
+
+#  Create Artist
+#  ----------------------------------------------------------------
+@bp.route('/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/create', methods=['POST'])
+def create_artist_submission():
+    from forms import ArtistForm
+    form = ArtistForm(request.form)
+    error = False
+
+    if form.validate() == False:
+        error = True
+    else:
+        try:
+            artist = Artist(
+                name=form.name.data,
+                city=form.city.data,
+                state=form.state.data,
+                phone=form.phone.data,
+                genres=form.genres.data,
+                image_link=form.image_link.data,
+                facebook_link=form.facebook_link.data,
+                website_link=form.website_link.data,
+                seeking_venue=form.seeking_venue.data,
+                seeking_description=form.seeking_description.data
+            )
+            db.session.add(artist)
+            db.session.flush()
+            reindex(Artist, [artist.id])
+            bump_listings('artists')
+            db.session.commit()
+        except:
+            db.session.rollback()
+            error = True
+        finally:
+            db.session.close()
+
+    if error:
+        flash('An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
+        return render_template('forms/new_artist.html', form=form)
+
+    cache.invalidate('artists')
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+    return redirect(url_for('pages.index'))
+
+#  Update Artist
+#  ----------------------------------------------------------------
+@bp.route('/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    from forms import ArtistForm
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        return abort(404)
+
+    form = ArtistForm()
+    form.name.data = artist.name
+    form.city.data = artist.city
+    form.state.data = artist.state
+    form.phone.data = artist.phone
+    form.genres.data = artist.genres
+    form.image_link.data = artist.image_link
+    form.facebook_link.data = artist.facebook_link
+    form.website_link.data = artist.website_link
+    form.seeking_venue.data = artist.seeking_venue
+    form.seeking_description.data = artist.seeking_description
+
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    from forms import ArtistForm
+    form = ArtistForm(request.form)
+    error = False
+
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        return abort(404)
+
+    if form.validate() == False:
+        error = True
+    else:
+        try:
+            artist.name=form.name.data
+            artist.city=form.city.data
+            artist.state=form.state.data
+            artist.phone=form.phone.data
+            artist.genres=form.genres.data
+            artist.image_link=form.image_link.data
+            artist.facebook_link=form.facebook_link.data
+            artist.website_link=form.website_link.data
+            artist.seeking_venue=form.seeking_venue.data
+            artist.seeking_description=form.seeking_description.data
+            touch_counterparts('artist', artist.id)
+            reindex(Artist, [artist.id])
+            bump_listings('artists', 'shows')
+            db.session.commit()
+        except:
+            db.session.rollback()
+            error = True
+        finally:
+            db.session.close()
+
+    if error:
+        flash('An error occurred. Artist ' + request.form['name'] + ' could not be updated.')
+        return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+    cache.invalidate(f'artist:{artist_id}', 'artists', 'shows')
+    flash('Artist ' + request.form['name'] + ' was successfully updated!')
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Delete Artist
+#  ----------------------------------------------------------------
+@bp.route('/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    name = db.session.query(Artist.name).filter(Artist.id == artist_id).scalar()
+    if name is None:
+        flash(f'Artist ID:{artist_id} not found.')
+        abort(404)
+
+    error = False
+    try:
+        # Set-based: no artist or show is loaded (see deletes.py).
+        venue_ids = delete(Artist, artist_id)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        error = True
+    finally:
+        db.session.close()
+
+    if error:
+        flash('An error occurred. Artist ' + name + ' could not be deleted.')
+        abort(500)
+
+    invalidate(Artist, artist_id, venue_ids)
+    flash('Artist ' + name + ' was successfully deleted!')
+    return '', 200
@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import click
+from flask import current_app, request, url_for, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz siblings are written without it
+    brotli = None
+
+try:
+    import rcssmin
+    import rjsmin
+except ImportError:  # optional; a conservative built-in minifier is used instead
+    rcssmin = rjsmin = None
+
+#----------------------------------------------------------------------------#
+# Bundles.
+#----------------------------------------------------------------------------#
+
+# Bundle name -> source files, relative to the static folder, in load order.
+BUNDLES = {
+    'css/app.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    # Loaded in <head>, before the page renders.
+    'js/head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # Deferred, at the end of <body>.
+    'js/app.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/script.js',
+    ],
+}
+
+# Build output under the static folder, served by the `asset` view below.
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.eot', '.otf', '.ttf'}
+# Fingerprinted files never change under the same name.
+MAX_AGE = 365 * 24 * 60 * 60
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+def fingerprint(name, content):
+    root, ext = posixpath.splitext(name)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+def minify_css(text):
+    if rcssmin:
+        return rcssmin.cssmin(text)
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    return re.sub(r'\s*([{};:,>])\s*', r'\1', text).strip()
+
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$', re.M)
+
+def minify_js(text):
+    # Source map comments would point the bundle at a map of one file.
+    text = SOURCE_MAP.sub('', text)
+    # Without rjsmin, sources are only concatenated; the libs ship minified.
+    return rjsmin.jsmin(text) if rjsmin else text
+
+def rewrite_css_urls(text, source, target, manifest):
+    """ Point relative url()s of `source` at the fingerprinted files, as seen
+    from the bundle written to `target`.
+    """
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+        name = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if name not in manifest:
+            return match.group(0)
+        relative = posixpath.relpath(manifest[name], posixpath.dirname(target))
+        return f'url("{relative}{suffix}")'
+    return CSS_URL.sub(replace, text)
+
+def write(dist, name, content):
+    """ Write a built file along with its precompressed siblings. """
+    path = os.path.join(dist, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    if posixpath.splitext(name)[1] not in COMPRESSIBLE:
+        return
+    siblings = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli:
+        siblings.append(('.br', brotli.compress(content)))
+    for suffix, compressed in siblings:
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+def build(static_folder, clean=False):
+    """ Fingerprint every static file, then bundle and minify BUNDLES.
+
+    Returns the manifest mapping logical names (e.g. 'css/app.css') to
+    built files under dist/, which is also written to dist/manifest.json.
+    Files of earlier builds are kept unless `clean`, so pages rendered by a
+    process that still holds the old manifest keep working.
+    """
+    dist = os.path.join(static_folder, DIST)
+    if clean:
+        shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename), static_folder).replace(os.sep, '/')
+            with open(os.path.join(root, filename), 'rb') as f:
+                content = f.read()
+            manifest[name] = fingerprint(name, content)
+            write(dist, manifest[name], content)
+
+    for bundle, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                text = f.read()
+            if bundle.endswith('.css'):
+                parts.append(minify_css(rewrite_css_urls(text, source, bundle, manifest)))
+            else:
+                # Keep a statement boundary between files; minified libs
+                # may end without a newline or semicolon.
+                parts.append(minify_js(text).rstrip() + '\n;')
+        content = '\n'.join(parts).encode()
+        manifest[bundle] = fingerprint(bundle, content)
+        write(dist, manifest[bundle], content)
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+def asset(filename):
+    """ Serve a built file, precompressed when the client accepts it, with
+    far-future immutable caching.
+    """
+    dist = os.path.join(current_app.static_folder, DIST)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(dist, filename + suffix)):
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, mimetype=mimetype)
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+def asset_url(name):
+    """ URL of a static file or bundle, fingerprinted once built. """
+    manifest = current_app.extensions['assets']
+    if name in manifest:
+        return url_for('asset', filename=manifest[name])
+    return url_for('static', filename=name)
+
+def asset_urls(name):
+    """ URLs to load for a bundle: the built bundle, or its sources one by
+    one when `flask assets build` has not been run (development).
+    """
+    if name in current_app.extensions['assets'] or name not in BUNDLES:
+        return [asset_url(name)]
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+def init_assets(app):
+    """ Load the manifest of the last build and register the helpers. """
+    try:
+        with open(os.path.join(app.static_folder, DIST, MANIFEST)) as f:
+            app.extensions['assets'] = json.load(f)
+    except FileNotFoundError:
+        app.extensions['assets'] = {}
+
+    app.add_url_rule(f'{app.static_url_path}/{DIST}/<path:filename>', 'asset', asset)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+assets_cli = AppGroup('assets', help='Build the fingerprinted static assets.')
+
+@assets_cli.command('build')
+@click.option('--clean', is_flag=True, help='Remove the files of earlier builds first.')
+def build_command(clean):
+    """ Bundle, minify, fingerprint and precompress static files. """
+    manifest = build(current_app.static_folder, clean=clean)
+    click.echo(f'Built {len(manifest)} assets into {os.path.join(current_app.static_folder, DIST)}.')
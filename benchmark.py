@@ -0,0 +1,750 @@
+""" Benchmark harness for the Fyyur views.
+
+    python benchmark.py seed --reset --shows 100000
+    python benchmark.py routes --output before.json
+    python benchmark.py load --workers 16 --duration 30 --output load.json
+    python benchmark.py compare before.json after.json
+    python benchmark.py explain
+    python benchmark.py startup --output startup.json
+
+Point DATABASE_URL at a scratch Postgres database; `seed --reset` drops
+every table in it. The models use Postgres ARRAY and full-text search
+columns, so SQLite cannot stand in for it.
+"""
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import click
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Measurement.
+#----------------------------------------------------------------------------#
+
+_local = threading.local()
+
+def _count_query(*args):
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+def percentile(samples, fraction):
+    """ Nearest-rank percentile of an already sorted list. """
+    if not samples:
+        return None
+    # The rank is rounded first so float noise (0.95 * 100 = 95.00000000000001)
+    # doesn't push it one place up.
+    index = max(0, min(len(samples) - 1, math.ceil(round(fraction * len(samples), 9)) - 1))
+    return samples[index]
+
+def summarize(latencies, queries=None):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 3) if latencies else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+    }
+    if queries:
+        summary['queries_per_request'] = round(sum(queries) / len(queries), 2)
+    return summary
+
+def metadata(**extra):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        **extra,
+    }
+
+def write_results(results, output):
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as stream:
+            stream.write(text + '\n')
+    click.echo(text)
+
+#----------------------------------------------------------------------------#
+# App.
+#----------------------------------------------------------------------------#
+
+def load_app(cache_enabled=False):
+    from app import create_app
+    from cache import cache
+
+    app = create_app()
+
+    if not cache_enabled:
+        app.config['CACHE_TYPE'] = 'null'
+        cache.init_app(app)
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['SLOW_REQUEST_MS'] = float('inf')
+
+    if not event.contains(Engine, 'after_cursor_execute', _count_query):
+        event.listen(Engine, 'after_cursor_execute', _count_query)
+    return app
+
+def build_cases(app):
+    """ One request per view, using the busiest venue and artist for the
+    parameterized routes. Warns about GET views nothing exercises.
+    """
+    from models import db, Venue, Artist
+
+    with app.app_context():
+        venue = db.session.query(Venue.id).order_by(
+            (Venue.upcoming_shows_count + Venue.past_shows_count).desc()
+        ).first()
+        artist = db.session.query(Artist.id).order_by(
+            (Artist.upcoming_shows_count + Artist.past_shows_count).desc()
+        ).first()
+        venue_id = venue.id if venue else 1
+        artist_id = artist.id if artist else 1
+        city, state = db.session.query(Venue.city, Venue.state).filter(Venue.id == venue_id).first() or CITIES[0]
+
+    # A month of nightly shows of the busiest artist, two years out.
+    first_night = datetime.now().replace(hour=20, minute=0, second=0, microsecond=0) + timedelta(days=730)
+    tour = json.dumps({'shows': [
+        {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': (first_night + timedelta(days=day)).isoformat()}
+        for day in range(30)
+    ]})
+
+    cases = {
+        'pages.index': ('GET', '/', None),
+        'venues.venues': ('GET', '/venues', None),
+        'venues.search_venues': ('POST', '/venues/search', {'search_term': 'the'}),
+        'venues.show_venue': ('GET', f'/venues/{venue_id}', None),
+        'venues.create_venue_form': ('GET', '/venues/create', None),
+        'venues.edit_venue': ('GET', f'/venues/{venue_id}/edit', None),
+        'artists.artists': ('GET', '/artists', None),
+        'artists.search_artists': ('POST', '/artists/search', {'search_term': 'the'}),
+        'artists.show_artist': ('GET', f'/artists/{artist_id}', None),
+        'artists.create_artist_form': ('GET', '/artists/create', None),
+        'artists.edit_artist': ('GET', f'/artists/{artist_id}/edit', None),
+        'shows.shows': ('GET', '/shows', None),
+        'shows.create_shows': ('GET', '/shows/create', None),
+        'api.venues': ('GET', '/api/venues', None),
+        'api.search_venues': ('GET', '/api/venues/search?q=the', None),
+        'api.browse_venues': ('GET', '/api/venues/browse?genre=Jazz&state=NY&seeking=1', None),
+        'api.venue': ('GET', f'/api/venues/{venue_id}', None),
+        'api.venue_upcoming_shows': ('GET', f'/api/venues/{venue_id}/upcoming_shows', None),
+        'api.venue_past_shows': ('GET', f'/api/venues/{venue_id}/past_shows', None),
+        'api.venue_matches': ('GET', f'/api/venues/{venue_id}/matches', None),
+        'api.artists': ('GET', '/api/artists', None),
+        'api.search_artists': ('GET', '/api/artists/search?q=the', None),
+        'api.browse_artists': ('GET', '/api/artists/browse?genre=Rock_n_Roll', None),
+        'api.artist': ('GET', f'/api/artists/{artist_id}', None),
+        'api.artist_upcoming_shows': ('GET', f'/api/artists/{artist_id}/upcoming_shows', None),
+        'api.artist_past_shows': ('GET', f'/api/artists/{artist_id}/past_shows', None),
+        'api.artist_matches': ('GET', f'/api/artists/{artist_id}/matches', None),
+        'api.shows': ('GET', '/api/shows', None),
+        'api.validate_tour': ('POST', '/api/shows/validate', tour),
+        'feeds.venue_calendar': ('GET', f'/venues/{venue_id}/shows.ics', None),
+        'feeds.artist_calendar': ('GET', f'/artists/{artist_id}/shows.ics', None),
+        'feeds.city_feed': ('GET', f'/cities/{state}/{urllib.parse.quote(city)}/shows.ndjson', None),
+    }
+
+    covered = set(cases)
+    for rule in app.url_map.iter_rules():
+        if 'GET' in rule.methods and rule.endpoint not in covered and rule.endpoint not in ('static', 'asset', 'metrics'):
+            click.echo(f'warning: no benchmark case for {rule.endpoint} ({rule.rule})', err=True)
+
+    return cases
+
+def timed_request(client, method, path, data):
+    _local.queries = 0
+    start = time.perf_counter()
+    # String bodies are JSON, dicts are form posts.
+    content_type = 'application/json' if isinstance(data, str) else None
+    response = client.open(path, method=method, data=data, content_type=content_type)
+    response.get_data()
+    elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise click.ClickException(f'{method} {path} returned {response.status_code}')
+    return elapsed, _local.queries
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@click.group()
+def cli():
+    """ Seed, benchmark and compare. """
+
+CITIES = [
+    ('New York', 'NY'), ('Brooklyn', 'NY'), ('San Francisco', 'CA'), ('Los Angeles', 'CA'),
+    ('Austin', 'TX'), ('Houston', 'TX'), ('Chicago', 'IL'), ('Seattle', 'WA'),
+    ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Portland', 'OR'), ('Boston', 'MA'),
+]
+WORDS = ['The', 'Blue', 'Red', 'Velvet', 'Room', 'Hall', 'Club', 'House', 'Moon', 'River',
+         'Band', 'Collective', 'Sound', 'Echo', 'Union', 'Social', 'Garden', 'Stage']
+
+@cli.command()
+@click.option('--shows', default=10000, show_default=True, help='Number of shows (1k to 1M).')
+@click.option('--venues', default=None, type=int, help='Defaults to shows / 20.')
+@click.option('--artists', default=None, type=int, help='Defaults to shows / 10.')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--chunk-size', default=10000, show_default=True)
+@click.option('--cities', type=int, help='Spread venues and artists over this many synthetic cities instead of the 12 real ones.')
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first.')
+def seed(shows, venues, artists, seed, chunk_size, cities, reset):
+    """ Fill the database with deterministic synthetic data. """
+    from enums import Genre, State
+    from models import db, Venue, Artist, Show
+    from counters import rebuild
+    from storage import ensure_partitions
+    from matches import reindex
+    from bookings import Calendar
+
+    app = load_app()
+    rng = random.Random(seed)
+    venues = venues or max(1, shows // 20)
+    artists = artists or max(1, shows // 10)
+    genres = [genre.name for genre in Genre]
+
+    def name():
+        return ' '.join(rng.sample(WORDS, 3))
+
+    def insert(model, count, make):
+        # Random bookings can collide on (artist, venue, start_time); drop those.
+        statement = postgresql.insert(model).on_conflict_do_nothing()
+        for start in range(0, count, chunk_size):
+            rows = [make() for _ in range(min(chunk_size, count - start))]
+            db.session.execute(statement, rows)
+            db.session.commit()
+            click.echo(f'{model.__tablename__}: {start + len(rows)}/{count}', err=True)
+
+    states = [state.name for state in State]
+
+    def place():
+        if cities:
+            number = rng.randrange(cities)
+            return {'city': f'City {number}', 'state': states[number % len(states)]}
+        return dict(zip(('city', 'state'), rng.choice(CITIES)))
+
+    with app.app_context():
+        # The primary only; the replicas in SQLALCHEMY_BINDS follow it.
+        if reset:
+            db.drop_all(bind_key=None)
+            db.create_all(bind_key=None)
+
+        insert(Venue, venues, lambda: {
+            'name': name(), **place(), 'address': f'{rng.randint(1, 999)} Main St',
+            'phone': f'{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}',
+            'genres': rng.sample(genres, rng.randint(1, 3)), 'seeking_talent': rng.random() < 0.3,
+        })
+        insert(Artist, artists, lambda: {
+            'name': name(), **place(), 'genres': rng.sample(genres, rng.randint(1, 3)),
+            'seeking_venue': rng.random() < 0.3,
+        })
+
+        venue_ids = [id for id, in db.session.query(Venue.id)]
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        now = datetime.now().replace(second=0, microsecond=0)
+        ensure_partitions(now - timedelta(days=365), now + timedelta(days=365))
+        db.session.commit()
+        calendar = Calendar()
+
+        def booking():
+            # Overlapping bookings would be refused by ShowSlot; draw again.
+            while True:
+                show = {
+                    'venue_id': rng.choice(venue_ids),
+                    'artist_id': rng.choice(artist_ids),
+                    'start_time': now + timedelta(minutes=30 * rng.randint(-17520, 17520)),
+                    'duration': rng.choice((60, 90, 120, 180)),
+                }
+                if not calendar.conflicts(show):
+                    calendar.add(show, None)
+                    return show
+
+        insert(Show, shows, booking)
+
+        rebuild()
+        db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+        reindex(Venue)
+        reindex(Artist)
+        db.session.commit()
+
+@cli.command()
+@click.option('--iterations', default=20, show_default=True, help='Timed requests per view.')
+@click.option('--warmup', default=3, show_default=True)
+@click.option('--cache', 'cache_enabled', is_flag=True, help='Leave the page cache on.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def routes(iterations, warmup, cache_enabled, output):
+    """ Time every view through the Flask test client. """
+    app = load_app(cache_enabled)
+    client = app.test_client()
+    results = {}
+
+    for name, (method, path, data) in build_cases(app).items():
+        for _ in range(warmup):
+            timed_request(client, method, path, data)
+        latencies, queries = [], []
+        for _ in range(iterations):
+            elapsed, count = timed_request(client, method, path, data)
+            latencies.append(elapsed)
+            queries.append(count)
+        results[name] = summarize(latencies, queries)
+        click.echo(f'{name}: p50 {results[name]["p50_ms"]:.2f} ms, {results[name]["queries_per_request"]} queries', err=True)
+
+    write_results({'kind': 'routes', 'meta': metadata(iterations=iterations, cache=cache_enabled), 'results': results}, output)
+
+@cli.command()
+@click.option('--workers', default=8, show_default=True)
+@click.option('--duration', default=10.0, show_default=True, help='Seconds to run.')
+@click.option('--url', help='Drive a running server over HTTP instead of the in-process app.')
+@click.option('--cache', 'cache_enabled', is_flag=True, help='Leave the page cache on.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def load(workers, duration, url, cache_enabled, output):
+    """ Concurrent load over a mix of every read view. """
+    app = load_app(cache_enabled)
+    cases = list(build_cases(app).items())
+    samples = {name: ([], []) for name, _ in cases}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(number):
+        rng = random.Random(number)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            name, (method, path, data) = rng.choice(cases)
+            if url:
+                if isinstance(data, str):
+                    body, headers = data.encode(), {'Content-Type': 'application/json'}
+                else:
+                    body, headers = (urllib.parse.urlencode(data).encode() if data else None), {}
+                start = time.perf_counter()
+                with urllib.request.urlopen(urllib.request.Request(url + path, data=body, headers=headers, method=method)) as response:
+                    response.read()
+                elapsed, count = (time.perf_counter() - start) * 1000, None
+            else:
+                elapsed, count = timed_request(client, method, path, data)
+            with lock:
+                samples[name][0].append(elapsed)
+                if count is not None:
+                    samples[name][1].append(count)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(worker, range(workers)))
+    elapsed = time.perf_counter() - started
+
+    every_latency = [latency for latencies, _ in samples.values() for latency in latencies]
+    every_query = [count for _, queries in samples.values() for count in queries]
+    results = {name: summarize(*sample) for name, sample in samples.items() if sample[0]}
+    results['all'] = summarize(every_latency, every_query)
+    results['all']['throughput_rps'] = round(len(every_latency) / elapsed, 1)
+
+    write_results({
+        'kind': 'load',
+        'meta': metadata(workers=workers, duration=duration, url=url, cache=cache_enabled),
+        'results': results,
+    }, output)
+
+# Nodes that hand rows up as they get them, in order, so a LIMIT above them
+# stops the scans beneath. Of a Nested Loop only the outer side streams; the
+# inner one runs again for every outer row.
+STREAMING = ('Limit', 'Nested Loop', 'Merge Join', 'Append', 'Merge Append', 'Subquery Scan', 'Result', 'Unique')
+
+def unindexed_scans(plan, tables, sizes, limited=False):
+    """ Scans in an EXPLAIN (ANALYZE, FORMAT JSON) plan that no index
+    condition drives: sequential scans; index scans without an Index Cond,
+    unless they only hand rows in index order to a LIMIT (the first page of
+    a listing); and scans whose condition reads half the table or more,
+    mostly to filter it out. `sizes` maps relations to their row
+    counts. Planned with enable_seqscan off, a table no index serves shows
+    up as one of these.
+    """
+    scans = []
+    node = plan['Node Type']
+    relation = plan.get('Relation Name')
+    # Partitions are named after their table: Show_2026_10, Show_default.
+    if relation is not None and relation.split('_')[0] in tables:
+        kept, removed = plan.get('Actual Rows', 0), plan.get('Rows Removed by Filter', 0)
+        if node == 'Seq Scan':
+            scans.append(f'Seq Scan on {relation}')
+        elif node in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in plan and not limited:
+            scans.append(f'full {node} on {relation}')
+        elif removed > kept and 2 * (kept + removed) > sizes.get(relation, float('inf')):
+            scans.append(f'{node} on {relation} reading {kept + removed} rows for {kept}')
+    limited = node == 'Limit' or (limited and node in STREAMING)
+    for position, child in enumerate(plan.get('Plans', [])):
+        scans += unindexed_scans(child, tables, sizes, limited and (node != 'Nested Loop' or position == 0))
+    return scans
+
+def view_scans(app, client, method, path, data, tables):
+    """ Request `path`, then re-run every SELECT it ran under EXPLAIN
+    ANALYZE with sequential scans disabled. Returns how many there were
+    and, for those with unindexed scans, the scans and the statement.
+    """
+    from models import db
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', capture)
+    try:
+        timed_request(client, method, path, data)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', capture)
+
+    failures = []
+    with app.app_context():
+        connection = db.session.connection()
+        # As of the last ANALYZE; -1 before the first.
+        sizes = {name: rows for name, rows in connection.exec_driver_sql(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND reltuples >= 0"
+        )}
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        for statement, parameters in captured:
+            plan = connection.exec_driver_sql('EXPLAIN (ANALYZE, FORMAT JSON) ' + statement, parameters).scalar()
+            scans = unindexed_scans(plan[0]['Plan'], tables, sizes)
+            if scans:
+                failures.append((scans, statement))
+        db.session.rollback()
+    return len(captured), failures
+
+@cli.command()
+@click.option('--table', 'tables', multiple=True, default=('Venue', 'Artist', 'Show'), show_default=True)
+def explain(tables):
+    """ Check that every query each view runs is driven by an index.
+
+    The statements a view executes are captured and re-run under EXPLAIN
+    ANALYZE with sequential scans disabled; an unindexed scan left in the
+    plan means no index covers that access path. Exits 1 if any view needs
+    one.
+    """
+    app = load_app()
+    client = app.test_client()
+
+    failures = 0
+    for name, (method, path, data) in build_cases(app).items():
+        count, found = view_scans(app, client, method, path, data, tables)
+        for scans, statement in found:
+            failures += 1
+            click.echo(f'{name}: {"; ".join(scans)}\n    {statement.splitlines()[0]}', err=True)
+        click.echo(f'{name}: {count} queries checked', err=True)
+
+    if failures:
+        sys.exit(1)
+
+@cli.command()
+@click.option('--lookups', default=1000, show_default=True, help='Timed lookups per side.')
+@click.option('--updates', default=200, show_default=True, help='Timed single-entity reindexes per side.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def matches(lookups, updates, output):
+    """ Time the match index on the seeded data: a full rebuild, ranked
+    lookups and incremental updates of random venues and artists.
+
+    Seed with many entities and cities to check it scales, e.g.
+    `seed --reset --shows 0 --venues 500000 --artists 500000 --cities 1000`.
+    """
+    from models import db
+    from matches import MATCH_SIDES, reindex, find_matches
+
+    app = load_app()
+    rng = random.Random(0)
+    results = {}
+
+    with app.app_context():
+        start = time.perf_counter()
+        db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+        for model in MATCH_SIDES:
+            reindex(model)
+        db.session.commit()
+        results['rebuild'] = summarize([(time.perf_counter() - start) * 1000])
+        db.session.execute(db.text('ANALYZE "VenueMatch", "ArtistMatch"'))
+        db.session.commit()
+
+        for model in MATCH_SIDES:
+            index, owner, seeking = MATCH_SIDES[model]
+            name = model.__tablename__.lower()
+            ids = db.session.scalars(db.select(model.id)).all()
+            results[f'{name}_index'] = {
+                'entities': len(ids),
+                'rows': db.session.query(db.func.count()).select_from(index).scalar(),
+                'largest_key': db.session.query(db.func.count()).select_from(index).group_by(
+                    index.state, index.city, index.genre
+                ).order_by(db.func.count().desc()).limit(1).scalar(),
+            }
+
+            latencies, found = [], []
+            for entity_id in rng.sample(ids, min(lookups, len(ids))):
+                start = time.perf_counter()
+                found.append(len(find_matches(model, entity_id)))
+                latencies.append((time.perf_counter() - start) * 1000)
+            results[f'{name}_lookup'] = summarize(latencies)
+            results[f'{name}_lookup']['mean_matches'] = round(sum(found) / len(found), 2) if found else 0
+
+            latencies = []
+            for entity_id in rng.sample(ids, min(updates, len(ids))):
+                start = time.perf_counter()
+                reindex(model, [entity_id])
+                db.session.commit()
+                latencies.append((time.perf_counter() - start) * 1000)
+            results[f'{name}_reindex'] = summarize(latencies)
+
+            click.echo(
+                f'{name}: {len(ids)} entities, lookup p50 {results[f"{name}_lookup"]["p50_ms"]:.3f} ms '
+                f'p95 {results[f"{name}_lookup"]["p95_ms"]:.3f} ms, reindex p50 {results[f"{name}_reindex"]["p50_ms"]:.3f} ms',
+                err=True
+            )
+
+    write_results({'kind': 'matches', 'meta': metadata(lookups=lookups, updates=updates), 'results': results}, output)
+
+@cli.command()
+@click.option('--shows', default=50000, show_default=True, help='Shows of each venue deleted.')
+@click.option('--batch-size', default=1000, show_default=True, help='Shows per purge transaction.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def deletes(shows, batch_size, output):
+    """ Time DELETE /venues/<id> of a venue with many shows, soft then hard,
+    and the purge batches that follow the soft delete. The venues and shows
+    are added to the seeded data for the run and are gone afterwards.
+    """
+    from models import db, Venue, Artist, Show
+    from deletes import purge_batch
+
+    app = load_app()
+    rng = random.Random(0)
+    results = {}
+
+    with app.app_context():
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        if not artist_ids:
+            raise click.ClickException('Seed first: the shows need artists.')
+        # Three hours apart and after every show listed so far, so none overlap.
+        last = db.session.scalar(db.select(db.func.max(Show.start_time))) or datetime.now()
+        first = last.replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+        for mode in ('soft', 'hard'):
+            venue = Venue(name=f'Deleted {mode}', city='Nowhere', state='NY', address='-', genres=['Other'])
+            db.session.add(venue)
+            db.session.commit()
+            venue_id = venue.id
+            statement = postgresql.insert(Show)
+            for start in range(0, shows, 10000):
+                db.session.execute(statement, [
+                    {'venue_id': venue_id, 'artist_id': rng.choice(artist_ids), 'start_time': first + timedelta(hours=3 * number)}
+                    for number in range(start, min(start + 10000, shows))
+                ])
+            db.session.commit()
+            first += timedelta(hours=3 * shows)
+
+            app.config['SOFT_DELETE'] = mode == 'soft'
+            start = time.perf_counter()
+            response = app.test_client().delete(f'/venues/{venue_id}')
+            results[f'{mode}_delete'] = summarize([(time.perf_counter() - start) * 1000])
+            if response.status_code != 200:
+                raise click.ClickException(f'DELETE /venues/{venue_id} returned {response.status_code}')
+
+            if mode == 'soft':
+                latencies = []
+                while True:
+                    start = time.perf_counter()
+                    done = purge_batch(Venue, venue_id, batch_size) is None
+                    db.session.commit()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if done:
+                        break
+                results['purge_batch'] = summarize(latencies)
+                results['purge_total'] = summarize([sum(latencies)])
+
+        click.echo(
+            f'{shows} shows: soft delete {results["soft_delete"]["p50_ms"]:.1f} ms, '
+            f'purge {len(latencies)} batches p50 {results["purge_batch"]["p50_ms"]:.1f} ms '
+            f'(total {results["purge_total"]["p50_ms"]:.0f} ms), hard delete {results["hard_delete"]["p50_ms"]:.1f} ms',
+            err=True
+        )
+
+    write_results({'kind': 'deletes', 'meta': metadata(shows=shows, batch_size=batch_size), 'results': results}, output)
+
+@cli.command()
+@click.option('--sizes', default='1000,10000,100000', show_default=True, help='Upcoming shows in each venue calendar.')
+@click.option('--iterations', default=5, show_default=True, help='Timed requests per size.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def feeds(sizes, iterations, output):
+    """ Time a venue calendar feed against its number of shows, with the
+    peak Python memory of reading it through, and its 304 revalidation.
+    The venues and shows are added to the seeded data for the run and are
+    gone afterwards.
+    """
+    import tracemalloc
+    from models import db, Venue, Artist, Show
+    from deletes import hard_delete
+
+    app = load_app()
+    client = app.test_client()
+    rng = random.Random(0)
+    results = {}
+
+    with app.app_context():
+        artist_ids = [id for id, in db.session.query(Artist.id)]
+        if not artist_ids:
+            raise click.ClickException('Seed first: the shows need artists.')
+        last = db.session.scalar(db.select(db.func.max(Show.start_time))) or datetime.now()
+        first = last.replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    for size in [int(size) for size in sizes.split(',')]:
+        with app.app_context():
+            venue = Venue(name=f'Feed {size}', city='Nowhere', state='NY', address='-', genres=['Other'])
+            db.session.add(venue)
+            db.session.commit()
+            venue_id = venue.id
+            statement = postgresql.insert(Show)
+            for start in range(0, size, 10000):
+                db.session.execute(statement, [
+                    {'venue_id': venue_id, 'artist_id': rng.choice(artist_ids), 'start_time': first + timedelta(hours=3 * number)}
+                    for number in range(start, min(start + 10000, size))
+                ])
+            db.session.commit()
+            first += timedelta(hours=3 * size)
+
+        def read_through():
+            response = client.get(path, buffered=False)
+            length = sum(len(chunk) for chunk in response.response)
+            response.close()
+            return response, length
+
+        # Memory in a pass of its own, tracing slows Python down severalfold.
+        path = f'/venues/{venue_id}/shows.ics'
+        tracemalloc.start()
+        read_through()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+        latencies, revalidations = [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response, length = read_through()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            revalidated = client.get(path, headers={'If-None-Match': response.headers['ETag']})
+            revalidations.append((time.perf_counter() - start) * 1000)
+            if revalidated.status_code != 304:
+                raise click.ClickException(f'{path} answered {revalidated.status_code} to its own ETag')
+
+        results[f'shows_{size}'] = dict(summarize(latencies), bytes=length, peak_mb=peak)
+        results[f'revalidate_{size}'] = summarize(revalidations)
+        click.echo(
+            f'{size} shows: {results[f"shows_{size}"]["p50_ms"]:.0f} ms for {length / 2 ** 20:.1f} MB, '
+            f'peak {peak:.1f} MB traced; 304 in {results[f"revalidate_{size}"]["p50_ms"]:.2f} ms',
+            err=True
+        )
+
+        with app.app_context():
+            hard_delete(Venue, venue_id)
+            db.session.commit()
+
+    write_results({'kind': 'feeds', 'meta': metadata(sizes=sizes, iterations=iterations), 'results': results}, output)
+
+# Run in a fresh interpreter per sample, like a worker booting. Prints the
+# boot time (imports and create_app), the first request to the home page,
+# peak RSS and which of the heavy optional imports got loaded.
+STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+booted = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+except ImportError:
+    rss = None
+print(json.dumps({
+    'boot_ms': (booted - start) * 1000,
+    'first_request_ms': (served - booted) * 1000,
+    'rss_mb': rss,
+    'loaded': sorted(name for name in HEAVY_MODULES if name in sys.modules),
+}))
+'''
+
+# Only needed by CLI commands or form views; none should load at boot.
+HEAVY_MODULES = ('pandas', 'alembic', 'flask_migrate', 'wtforms', 'flask_wtf')
+
+@cli.command()
+@click.option('--runs', default=10, show_default=True, help='Fresh interpreters to start.')
+@click.option('--output', type=click.Path(), help='Write the JSON results here too.')
+def startup(runs, output):
+    """ Time a worker's boot and measure its memory, in fresh processes. """
+    probe = STARTUP_PROBE.replace('HEAVY_MODULES', repr(HEAVY_MODULES))
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', probe], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if result.returncode != 0:
+            raise click.ClickException(result.stderr.strip().splitlines()[-1])
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    rss = [sample['rss_mb'] for sample in samples if sample['rss_mb'] is not None]
+    results = {
+        'boot': summarize([sample['boot_ms'] for sample in samples]),
+        'first_request': summarize([sample['first_request_ms'] for sample in samples]),
+    }
+    results['boot']['rss_mb'] = round(max(rss), 1) if rss else None
+    results['boot']['heavy_modules'] = samples[-1]['loaded']
+    click.echo(f'boot: p50 {results["boot"]["p50_ms"]:.1f} ms, {results["boot"]["rss_mb"]} MB', err=True)
+    if samples[-1]['loaded']:
+        click.echo(f'warning: loaded at boot: {", ".join(samples[-1]["loaded"])}', err=True)
+
+    write_results({'kind': 'startup', 'meta': metadata(runs=runs), 'results': results}, output)
+
+@cli.command()
+@click.argument('baseline', type=click.File())
+@click.argument('candidate', type=click.File())
+@click.option('--metric', default='p95_ms', show_default=True)
+@click.option('--threshold', default=0.10, show_default=True, help='Allowed relative slowdown.')
+def compare(baseline, candidate, metric, threshold):
+    """ Compare two result files; exits 1 on a regression. """
+    before = json.load(baseline)['results']
+    after = json.load(candidate)['results']
+    regressions = 0
+
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name].get(metric), after[name].get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change > threshold
+
+        queries = ''
+        if 'queries_per_request' in before[name] and 'queries_per_request' in after[name]:
+            queries = f'  queries {before[name]["queries_per_request"]} -> {after[name]["queries_per_request"]}'
+            regressed = regressed or after[name]['queries_per_request'] > before[name]['queries_per_request']
+
+        regressions += regressed
+        flag = '  REGRESSION' if regressed else ''
+        click.echo(f'{name:20} {metric} {old:9.2f} -> {new:9.2f} ({change:+.1%}){queries}{flag}')
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    cli()
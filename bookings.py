@@ -0,0 +1,134 @@
+from bisect import bisect_right
+from datetime import timedelta
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from models import db, SHOW_DURATION, ShowSlot, slot_key
+
+#----------------------------------------------------------------------------#
+# Slots.
+#----------------------------------------------------------------------------#
+
+# A show holds its artist and its venue for [start_time, start_time +
+# duration); back-to-back shows don't overlap. Each side with the ShowSlot
+# column and exclusion constraint that guard it.
+SIDES = (
+    ('artist', 'artist_id', 'ex_ShowSlot_artist_id_during'),
+    ('venue', 'venue_id', 'ex_ShowSlot_venue_id_during'),
+)
+
+def show_end(start_time, duration=None):
+    return start_time + timedelta(minutes=duration or SHOW_DURATION)
+
+def booking_conflict(error):
+    """ The side ('artist' or 'venue') whose exclusion constraint rejected
+    an insert, or None if `error` is anything else.
+    """
+    if isinstance(error, IntegrityError):
+        constraint = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+        for side, key, name in SIDES:
+            if constraint == name:
+                return side
+    return None
+
+#----------------------------------------------------------------------------#
+# Batches.
+#----------------------------------------------------------------------------#
+
+class Calendar:
+    """ The shows accepted so far in a batch, per artist and per venue, so a
+    batch can be checked against itself without a query per show.
+
+    Accepted shows of one artist (or venue) never overlap each other, so
+    their intervals stay sorted by start and by end alike: a new interval
+    can only overlap the one starting just before it or the one starting
+    just after, found by bisection in O(log n).
+    """
+    def __init__(self):
+        self.starts = {}
+        self.entries = {}
+
+    def conflicts(self, show):
+        """ [(side, payload)] of the accepted shows `show` overlaps. """
+        start, end = show['start_time'], show_end(show['start_time'], show.get('duration'))
+        found = []
+        for side, key, _ in SIDES:
+            starts = self.starts.get((side, show[key]), [])
+            entries = self.entries.get((side, show[key]), [])
+            position = bisect_right(starts, start)
+            if position and entries[position - 1][0] > start:
+                found.append((side, entries[position - 1][1]))
+            if position < len(starts) and starts[position] < end:
+                found.append((side, entries[position][1]))
+        return found
+
+    def add(self, show, payload):
+        start, end = show['start_time'], show_end(show['start_time'], show.get('duration'))
+        for side, key, _ in SIDES:
+            starts = self.starts.setdefault((side, show[key]), [])
+            entries = self.entries.setdefault((side, show[key]), [])
+            position = bisect_right(starts, start)
+            starts.insert(position, start)
+            entries.insert(position, (end, payload))
+
+def booked_statement():
+    """ Existing bookings overlapping any of a batch of proposed shows, given
+    as parallel arrays: one statement whatever the batch size, so it is
+    compiled once. Every proposed show probes the ShowSlot GiST indexes for
+    its artist and for its venue.
+    """
+    proposed = db.func.unnest(
+        db.bindparam('artist_ids', type_=postgresql.ARRAY(db.Integer)),
+        db.bindparam('venue_ids', type_=postgresql.ARRAY(db.Integer)),
+        db.bindparam('starts', type_=postgresql.ARRAY(db.DateTime)),
+        db.bindparam('ends', type_=postgresql.ARRAY(db.DateTime)),
+    ).table_valued(
+        db.column('artist_id', db.Integer),
+        db.column('venue_id', db.Integer),
+        db.column('start_time', db.DateTime),
+        db.column('end_time', db.DateTime),
+        with_ordinality='position'
+    ).render_derived(name='proposed')
+    during = db.func.tsrange(proposed.c.start_time, proposed.c.end_time)
+    return db.union_all(*[
+        db.select(proposed.c.position, db.literal(side), ShowSlot.show_id).join(ShowSlot, db.and_(
+            slot_key(getattr(ShowSlot, key)).op('&&')(slot_key(proposed.c[key])),
+            ShowSlot.during.op('&&')(during)
+        ))
+        for side, key, _ in SIDES
+    ])
+
+BOOKED = booked_statement()
+
+def booked_conflicts(shows):
+    """ {position: [(side, show id)]} of existing bookings overlapping each of
+    `shows`.
+    """
+    if not shows:
+        return {}
+    found = {}
+    for position, side, show_id in db.session.execute(BOOKED, {
+        'artist_ids': [show['artist_id'] for show in shows],
+        'venue_ids': [show['venue_id'] for show in shows],
+        'starts': [show['start_time'] for show in shows],
+        'ends': [show_end(show['start_time'], show.get('duration')) for show in shows],
+    }):
+        found.setdefault(position - 1, []).append((side, show_id))
+    return found
+
+def check_bookings(shows):
+    """ The conflicts of each of `shows` (dicts with artist_id, venue_id,
+    start_time and duration), taken in order: with existing bookings, as
+    {'side', 'show_id'}, and with earlier shows of the batch that had none,
+    as {'side', 'entry'} (its position). Returns one list per show; the
+    shows with an empty one can all be booked together.
+    """
+    booked = booked_conflicts(shows)
+    calendar = Calendar()
+    results = []
+    for position, show in enumerate(shows):
+        conflicts = [{'side': side, 'show_id': show_id} for side, show_id in booked.get(position, [])]
+        conflicts += [{'side': side, 'entry': entry} for side, entry in calendar.conflicts(show)]
+        if not conflicts:
+            calendar.add(show, position)
+        results.append(conflicts)
+    return results
@@ -0,0 +1,63 @@
+from enums import GENRES_BY_CODE
+from models import db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+# Flag matched by `seeking`: venues seeking talent, artists seeking venues.
+SEEKING = {Venue: 'seeking_talent', Artist: 'seeking_venue'}
+
+def browse_filters(model, genres=(), state=None, seeking=None):
+    """ WHERE clauses of a browse, e.g. "Jazz venues in NY seeking talent":
+    every one of `genres` (GIN index on the genre codes), the state (btree)
+    and the seeking flag.
+    """
+    filters = []
+    if genres:
+        filters.append(model.genres.contains(list(genres)))
+    if state:
+        filters.append(model.state == state)
+    if seeking is not None:
+        flag = getattr(model, SEEKING[model])
+        filters.append(flag.is_(True) if seeking else flag.isnot(True))
+    return filters
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+def browse_rows(model, filters):
+    return db.session.query(
+        model.id,
+        model.name,
+        model.city,
+        model.state,
+        model.genres,
+        model.upcoming_shows_count.label('num_upcoming_shows')
+    ).filter(*filters)
+
+def facet_counts(model, filters):
+    """ The number of matches, in all, per state and per genre.
+
+    One statement: the matching rows are selected once, through the
+    indexes, into a CTE that the three counts read.
+    """
+    matches = db.select(model.state, model.genres).where(*filters).cte('matches')
+    codes = db.func.unnest(matches.c.genres).table_valued('code').render_derived()
+    counts = db.union_all(
+        db.select(db.literal('total'), db.literal(''), db.func.count()).select_from(matches),
+        db.select(db.literal('state'), matches.c.state, db.func.count()).group_by(matches.c.state),
+        db.select(db.literal('genre'), db.cast(codes.c.code, db.String), db.func.count())
+        .select_from(matches).join(codes, db.true()).group_by(codes.c.code),
+    )
+
+    total, states, genres = 0, {}, {}
+    for facet, value, count in db.session.execute(counts):
+        if facet == 'total':
+            total = count
+        elif facet == 'state':
+            states[value] = count
+        else:
+            genres[GENRES_BY_CODE[int(value)]] = count
+    return total, {'genre': genres, 'state': states}
@@ -0,0 +1,355 @@
+import csv
+import io
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from werkzeug.datastructures import MultiDict
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from forms import VenueForm, ArtistForm, ShowForm
+from enums import Genre
+from models import db, Venue, Artist, Show, SHOW_DURATION
+from counters import recount
+from matches import reindex
+from bookings import check_bookings, booking_conflict
+from cache import cache
+from conditional import bump_listings
+
+#----------------------------------------------------------------------------#
+# Kinds.
+#----------------------------------------------------------------------------#
+
+KINDS = {
+    'venues': (Venue, VenueForm, [
+        'name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website_link', 'seeking_talent', 'seeking_description'
+    ]),
+    'artists': (Artist, ArtistForm, [
+        'name', 'city', 'state', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website_link', 'seeking_venue', 'seeking_description'
+    ]),
+    'shows': (Show, ShowForm, ['artist_id', 'venue_id', 'start_time', 'duration']),
+}
+
+GENRE_NAMES = {genre.value: genre.name for genre in Genre}
+BOOLEAN_FIELDS = {'seeking_talent', 'seeking_venue'}
+LIST_SEPARATOR = ';'
+
+def detect_format(path, format):
+    if format:
+        return format
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+
+def formdata(record, fields):
+    """ Turn a CSV/NDJSON record into what the web form would have posted. """
+    data = MultiDict()
+    for field in fields:
+        value = record.get(field)
+        if value is None:
+            continue
+        if field == 'genres':
+            if isinstance(value, str):
+                value = [genre.strip() for genre in value.split(LIST_SEPARATOR) if genre.strip()]
+            for genre in value:
+                data.add(field, GENRE_NAMES.get(genre, genre))
+        elif field in BOOLEAN_FIELDS:
+            if str(value).strip().lower() in ('1', 'true', 't', 'y', 'yes'):
+                data.add(field, 'y')
+        elif field == 'start_time':
+            try:
+                data.add(field, datetime.fromisoformat(str(value)).strftime('%Y-%m-%d %H:%M:%S'))
+            except ValueError:
+                data.add(field, str(value))
+        else:
+            data.add(field, str(value))
+    return data
+
+def validate(form_class, fields, record):
+    """ Run a record through the same form the web handlers use.
+    Returns (values, None) or (None, errors).
+    """
+    form = form_class(formdata=formdata(record, fields), meta={'csrf': False})
+    if not form.validate():
+        return None, {field: messages for field, messages in form.errors.items() if messages}
+
+    # Required fields fall back to their defaults when absent from the
+    # record (ShowForm.start_time would become "now"), so reject those here.
+    missing = [field for field in fields if form[field].flags.required and not form[field].raw_data]
+    if missing:
+        return None, {field: ['This field is required.'] for field in missing}
+
+    return {field: form[field].data for field in fields}, None
+
+#----------------------------------------------------------------------------#
+# Import.
+#----------------------------------------------------------------------------#
+
+def read_records(stream, format):
+    """ Yield (line number, record) without holding the file in memory. """
+    if format == 'ndjson':
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield number, error
+                continue
+            if not isinstance(record, dict):
+                record = ValueError('Expected an object.')
+            yield number, record
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+
+def conflict_message(conflict):
+    if 'show_id' in conflict:
+        return f"The {conflict['side']} is already booked at that time (show {conflict['show_id']})."
+    return f"The {conflict['side']} is also booked at that time by entry {conflict['entry']}."
+
+def check_shows(rows):
+    """ Drop shows whose venue or artist is missing, that already exist or
+    that overlap another booking of their artist or venue, or an earlier
+    accepted row.
+    """
+    rejected = []
+    for number, row in rows:
+        for field in ('venue_id', 'artist_id'):
+            if not str(row[field]).strip().isdigit():
+                rejected.append((number, {field: ['Not a valid id.']}))
+                break
+            row[field] = int(row[field])
+        row['duration'] = row.get('duration') or SHOW_DURATION
+    rejected_numbers = {number for number, _ in rejected}
+    rows = [(number, row) for number, row in rows if number not in rejected_numbers]
+
+    venue_ids = {row['venue_id'] for _, row in rows}
+    artist_ids = {row['artist_id'] for _, row in rows}
+    known_venues = {id for id, in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+    known_artists = {id for id, in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+    existing = set(db.session.query(Show.artist_id, Show.venue_id, Show.start_time).filter(
+        db.tuple_(Show.artist_id, Show.venue_id, Show.start_time).in_(
+            [(row['artist_id'], row['venue_id'], row['start_time']) for _, row in rows]
+        )
+    ))
+
+    accepted = []
+    for number, row in rows:
+        key = (row['artist_id'], row['venue_id'], row['start_time'])
+        if row['venue_id'] not in known_venues:
+            rejected.append((number, {'venue_id': ['Venue not found.']}))
+        elif row['artist_id'] not in known_artists:
+            rejected.append((number, {'artist_id': ['Artist not found.']}))
+        elif key in existing:
+            rejected.append((number, {'start_time': ['Show already exists.']}))
+        else:
+            existing.add(key)
+            accepted.append((number, row))
+
+    booked = []
+    checked = check_bookings([row for _, row in accepted])
+    for (number, row), conflicts in zip(accepted, checked):
+        if conflicts:
+            # Name the earlier row by its line, not its position in the chunk.
+            for conflict in conflicts:
+                if 'entry' in conflict:
+                    conflict['entry'] = accepted[conflict['entry']][0]
+            rejected.append((number, {'start_time': [conflict_message(conflict) for conflict in conflicts]}))
+        else:
+            booked.append((number, row))
+    return booked, rejected
+
+def insert_shows(statement, rows):
+    """ Insert checked shows with one batched statement. A show booked
+    since check_shows() that overlaps one of them fails it on ShowSlot's
+    exclusion constraints; the shows then go in one by one, each in a
+    savepoint, and those still overlapping are rejected. Returns the
+    inserted ids and the rejected rows.
+    """
+    try:
+        with db.session.begin_nested():
+            return db.session.scalars(statement, [row for _, row in rows]).all(), []
+    except IntegrityError as error:
+        if booking_conflict(error) is None:
+            raise
+
+    inserted, rejected = [], []
+    for number, row in rows:
+        try:
+            with db.session.begin_nested():
+                inserted += db.session.scalars(statement, [row]).all()
+        except IntegrityError as error:
+            side = booking_conflict(error)
+            if side is None:
+                raise
+            rejected.append((number, {'start_time': [f'The {side} is already booked at that time.']}))
+    return inserted, rejected
+
+def insert_chunk(kind, model, rows):
+    if kind == 'shows':
+        rows, rejected = check_shows(rows)
+    else:
+        rejected = []
+
+    if rows:
+        # A list of parameter sets is sent as one batched executemany.
+        statement = insert(model).returning(model.id)
+        if kind == 'shows':
+            # Rows booked concurrently since check_shows() are skipped when
+            # they duplicate a show, and rejected when they overlap one.
+            statement = statement.on_conflict_do_nothing(constraint='uq_Show_artist_id_venue_id_start_time')
+            inserted, conflicts = insert_shows(statement, rows)
+            rejected += conflicts
+        else:
+            inserted = db.session.scalars(statement, [row for _, row in rows]).all()
+            reindex(model, inserted)
+    else:
+        inserted = []
+
+    if kind == 'shows' and rows:
+        venue_ids = {row['venue_id'] for _, row in rows}
+        artist_ids = {row['artist_id'] for _, row in rows}
+        recount(Venue, Show.venue_id, venue_ids)
+        recount(Artist, Show.artist_id, artist_ids)
+        tags = ['shows', 'venues', 'artists', *[f'venue:{id}' for id in venue_ids], *[f'artist:{id}' for id in artist_ids]]
+    elif rows:
+        tags = [kind]
+    else:
+        tags = []
+
+    bump_listings(*tags)
+    db.session.commit()
+    cache.invalidate(*tags)
+    return len(inserted), rejected
+
+def report(path, number, errors):
+    for field, messages in errors.items():
+        for message in messages:
+            click.echo(f'{path}:{number}: {field}: {message}', err=True)
+
+def import_records(kind, stream, format, path='-', chunk_size=1000):
+    """ Validate and insert records chunk by chunk, committing each chunk.
+    Invalid rows are reported and skipped. Returns (inserted, rejected).
+    """
+    model, form_class, fields = KINDS[kind]
+    inserted = rejected = 0
+    chunk = []
+
+    def flush():
+        nonlocal inserted, rejected
+        count, failures = insert_chunk(kind, model, chunk)
+        inserted += count
+        rejected += len(failures)
+        for number, errors in failures:
+            report(path, number, errors)
+        chunk.clear()
+
+    for number, record in read_records(stream, format):
+        if isinstance(record, Exception):
+            values, errors = None, {'record': [str(record)]}
+        else:
+            values, errors = validate(form_class, fields, record)
+
+        if errors:
+            rejected += 1
+            report(path, number, errors)
+            continue
+
+        chunk.append((number, values))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return inserted, rejected
+
+#----------------------------------------------------------------------------#
+# Export.
+#----------------------------------------------------------------------------#
+
+def export_records(kind, stream, format, chunk_size=1000):
+    """ Stream a table out through a server-side cursor. """
+    model, form_class, fields = KINDS[kind]
+    columns = ['id'] + fields
+    rows = db.session.query(*[getattr(model, column) for column in columns]).order_by(model.id).yield_per(chunk_size)
+
+    writer = None
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        record = {}
+        for column, value in zip(columns, row):
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, list) and writer is not None:
+                value = LIST_SEPARATOR.join(value)
+            record[column] = value
+
+        if writer is not None:
+            writer.writerow(record.values())
+        else:
+            stream.write(json.dumps(record) + '\n')
+        count += 1
+
+    return count
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@contextmanager
+def open_stream(path, mode):
+    """ PATH, or stdin/stdout for '-', as UTF-8 text without newline
+    translation: the csv module needs that to read and write quoted fields
+    spanning lines.
+    """
+    if path != '-':
+        with open(path, mode, encoding='utf-8', newline='') as stream:
+            yield stream
+        return
+    stream = io.TextIOWrapper(sys.stdin.buffer if 'r' in mode else sys.stdout.buffer, encoding='utf-8', newline='')
+    try:
+        yield stream
+    finally:
+        stream.flush()
+        stream.detach()
+
+data_cli = AppGroup('data', help='Bulk import and export of venues, artists and shows.')
+
+@data_cli.command('import')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', type=click.Path(allow_dash=True))
+@click.option('--format', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=1000, show_default=True)
+def import_command(kind, path, format, chunk_size):
+    """ Import KIND records from PATH ('-' for stdin). """
+    format = detect_format(path, format)
+    with open_stream(path, 'r') as stream:
+        inserted, rejected = import_records(kind, stream, format, path, chunk_size)
+    click.echo(f'Imported {inserted} {kind}, rejected {rejected}.', err=True)
+    if rejected:
+        sys.exit(1)
+
+@data_cli.command('export')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', type=click.Path(allow_dash=True))
+@click.option('--format', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=1000, show_default=True)
+def export_command(kind, path, format, chunk_size):
+    """ Export KIND records to PATH ('-' for stdout). """
+    format = detect_format(path, format)
+    with open_stream(path, 'w') as stream:
+        count = export_records(kind, stream, format, chunk_size)
+    click.echo(f'Exported {count} {kind}.', err=True)
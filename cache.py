@@ -0,0 +1,195 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request, session, make_response
+from replicas import on_primary, on_replica
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+class LRUCache:
+    """ In-process backend; entries are evicted least recently used first. """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(entry[0] if entry is not None else None)
+        return values
+
+    def set(self, key, value, ttl=None, only_if_missing=False):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if only_if_missing and key in self._entries:
+                return
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class RedisCache:
+    """ Shared backend for anything speaking the redis client API, so a
+    local stand-in (a redis/valkey container, fakeredis) can replace the
+    production server.
+    """
+
+    def __init__(self, client, prefix='fyyur:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        values = self.client.mget([self.prefix + key for key in keys])
+        return [pickle.loads(value) if value is not None else None for value in values]
+
+    def set(self, key, value, ttl=None, only_if_missing=False):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None, nx=only_if_missing)
+
+class NullCache:
+    def get_many(self, keys):
+        return [None for key in keys]
+
+    def set(self, key, value, ttl=None, only_if_missing=False):
+        pass
+
+def make_backend(config):
+    kind = config.get('CACHE_TYPE', 'lru')
+    if kind == 'lru':
+        return LRUCache(config.get('CACHE_MAX_ENTRIES', 1024))
+    if kind == 'redis':
+        import redis
+        return RedisCache(redis.Redis.from_url(config['CACHE_REDIS_URL']), config.get('CACHE_KEY_PREFIX', 'fyyur:'))
+    if kind == 'null':
+        return NullCache()
+    raise ValueError(f'Unknown CACHE_TYPE {kind!r}.')
+
+#----------------------------------------------------------------------------#
+# Cache.
+#----------------------------------------------------------------------------#
+
+def invalidated_since(version, seconds):
+    """ Whether a tag version was given by invalidate() less than
+    `seconds` ago. None, a tag the backend doesn't hold, never was.
+    """
+    if version is None:
+        return False
+    token, _, given = version.partition('@')
+    return bool(given) and time.time() - float(given) < seconds
+
+class Cache:
+    """ Read-through cache for rendered pages and fragments.
+
+    Every entry records the version of each tag it depends on (e.g.
+    'venue:3'). invalidate() gives a tag a fresh version, which turns
+    every entry recorded against the old one into a miss. Versions are
+    random tokens rather than counters, so a version evicted from the
+    backend can never be mistaken for a newer one; those given by
+    invalidate() also carry the time they were given.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.default_ttl = None
+        self.replica_lag = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = make_backend(app.config)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+        self.replica_lag = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    def _versions(self, tags):
+        return self.backend.get_many(['tag:' + tag for tag in tags])
+
+    def get(self, key):
+        entry, = self.backend.get_many(['entry:' + key])
+        if entry is None:
+            return None
+        value, versions = entry
+        if self._versions(versions.keys()) != list(versions.values()):
+            return None
+        return value
+
+    def set(self, key, value, tags=(), ttl=None, settled=0):
+        """ Store `value` against the current versions of `tags`; with
+        `settled`, only if none of them was invalidated in the last
+        `settled` seconds.
+        """
+        tags = sorted(set(tags))
+        versions = self._versions(tags)
+        for index, tag in enumerate(tags):
+            if versions[index] is None:
+                self.backend.set('tag:' + tag, uuid.uuid4().hex, only_if_missing=True)
+        versions = dict(zip(tags, self._versions(tags)))
+        if settled and any(invalidated_since(version, settled) for version in versions.values()):
+            return
+        self.backend.set('entry:' + key, (value, versions), ttl or self.default_ttl)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set('tag:' + tag, f'{uuid.uuid4().hex}@{time.time():.3f}')
+
+    def tag(self, *tags):
+        """ Add dependencies discovered while building the current page. """
+        g.setdefault('cache_tags', set()).update(tags)
+
+    def fragment(self, key, render, tags=(), ttl=None):
+        value = self.get('fragment:' + key)
+        if value is None:
+            value = render()
+            self.set('fragment:' + key, value, tags, ttl)
+        return value
+
+    def page(self, *tags, ttl=None):
+        """ Cache a GET view's 200 responses, body and content type, by full
+        path. Streamed responses are passed through and never stored:
+        storing one would buffer the whole body first.
+
+        Tags are formatted with the view arguments, e.g. 'venue:{venue_id}'.
+        Requests carrying flashed messages skip the cache entirely, since
+        those end up in the rendered layout. Requests pinned to the primary
+        after a write render afresh: the entry may have been rendered from a
+        replica that hadn't caught up yet. For the same reason, pages read
+        from a replica aren't stored while one of their tags was invalidated
+        less than REPLICA_STICKY_SECONDS ago. Under @conditional the entry is
+        also keyed by the ETag, so a worker whose tags missed an
+        invalidation can't pair an old body with a current ETag.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                if request.method != 'GET' or '_flashes' in session:
+                    return view(**kwargs)
+
+                key = 'response:' + request.full_path + '#' + g.get('page_validator', '')
+                cached = None if on_primary() else self.get(key)
+                if cached is not None:
+                    body, content_type = cached
+                    return make_response(body, 200, {'Content-Type': content_type})
+
+                g.cache_tags = {tag.format(**kwargs) for tag in tags}
+                response = make_response(view(**kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    cached = (response.get_data(), response.content_type)
+                    self.set(key, cached, g.cache_tags, ttl, self.replica_lag if on_replica() else 0)
+                return response
+            return wrapper
+        return decorator
+
+cache = Cache()
@@ -0,0 +1,159 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, request, session, make_response
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.http import is_resource_modified
+from sqlalchemy.dialects import postgresql
+from models import db, Venue, Artist, Show, ShowArchive, ListingVersion, LISTINGS
+from queries import SHOW_SIDES
+
+#----------------------------------------------------------------------------#
+# Validators.
+#----------------------------------------------------------------------------#
+
+# Each returns a small tuple that changes whenever the page it stands for
+# does, read by primary key instead of rendering the page. Venue and Artist
+# rows are touched by everything shown on their pages: edits, bookings
+# (through the counters), counter sweeps as shows start, and edits of the
+# venues/artists they share shows with. The listings have a version each.
+
+def utc(column):
+    # Stored as the server's local time; Last-Modified is in UTC.
+    return db.func.timezone('UTC', db.cast(column, db.DateTime(timezone=True)))
+
+def listing_state(name):
+    return tuple(db.session.query(ListingVersion.version).filter(ListingVersion.name == name).one_or_none() or ())
+
+def venues_state():
+    return listing_state('venues')
+
+def artists_state():
+    return listing_state('artists')
+
+def shows_state():
+    return listing_state('shows')
+
+def venue_state(venue_id):
+    return db.session.query(utc(Venue.updated_at)).filter(Venue.id == venue_id).scalar()
+
+def artist_state(artist_id):
+    return db.session.query(utc(Artist.updated_at)).filter(Artist.id == artist_id).scalar()
+
+def venue_matches_state(venue_id):
+    # The artists listed come with their counts.
+    state = venue_state(venue_id)
+    return None if state is None else (state, *artists_state())
+
+def artist_matches_state(artist_id):
+    state = artist_state(artist_id)
+    return None if state is None else (state, *venues_state())
+
+def city_state(state, city):
+    # Artist edits and bookings touch the venues too.
+    return tuple(db.session.query(db.func.count(Venue.id), db.func.max(utc(Venue.updated_at))).filter(
+        Venue.city == city, Venue.state == state
+    ).one())
+
+def bump_listings(*tags):
+    """ Give the listings among the cache `tags` ('venues', 'artists',
+    'shows') new versions, in the caller's transaction. Call it last before
+    the commit: it holds their rows locked until then, taken in one order
+    after every other write, so concurrent writers queue there instead of
+    deadlocking.
+    """
+    names = sorted(set(tags) & set(LISTINGS))
+    if not names:
+        return
+    db.session.flush()
+    statement = postgresql.insert(ListingVersion).values([{'name': name, 'version': 1} for name in names])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[ListingVersion.name], set_={'version': ListingVersion.version + 1}
+    ))
+
+def touch_counterparts(side, owner_id):
+    """ Mark every artist (for side='venue') or venue (for side='artist')
+    sharing a show with the given one as updated; their pages list its name
+    and image.
+    """
+    owner_key, other_name, other = SHOW_SIDES[side]
+    other_key = f'{other_name}_id'
+    ids = db.union(
+        db.select(getattr(Show, other_key)).where(getattr(Show, owner_key) == owner_id),
+        db.select(getattr(ShowArchive, other_key)).where(getattr(ShowArchive, owner_key) == owner_id),
+    )
+    db.session.execute(
+        db.update(other).where(other.id.in_(ids)).values(updated_at=db.func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#----------------------------------------------------------------------------#
+
+def conditional(state):
+    """ Answer If-None-Match/If-Modified-Since for a GET view from
+    `state(**view_args)` before the view runs, and send ETag, Last-Modified
+    and Cache-Control on full responses.
+
+    A state of None (entity not found) falls through to the view. Requests
+    with flashed messages are neither validated nor cacheable, since the
+    messages end up in the layout.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.method != 'GET' or '_flashes' in session:
+                response = make_response(view(**kwargs))
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+
+            values = state(**kwargs)
+            if values is None:
+                return view(**kwargs)
+            if not isinstance(values, tuple):
+                values = (values,)
+
+            release = current_app.config.get('RELEASE', '')
+            etag = hashlib.sha1(repr((release, request.full_path, values)).encode()).hexdigest()
+            last_modified = max((value for value in values if isinstance(value, datetime)), default=None)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                # Keys the page cache entry (see Cache.page), so the body
+                # sent under this ETag was rendered from the same state.
+                g.page_validator = etag
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Browsers always revalidate; shared caches may serve the page
+            # for a few seconds first. Visitors with a session cookie may
+            # have flashed messages pending, so keep them apart.
+            response.cache_control.public = True
+            response.cache_control.max_age = 0
+            response.cache_control.s_maxage = current_app.config.get('HTTP_SHARED_MAX_AGE', 0)
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
+
+class PrivateSessionInterface(SecureCookieSessionInterface):
+    """ The cookie session, making every response that sets or clears the
+    cookie private: a shared cache must not replay one visitor's session
+    (its CSRF token, flashed messages, pin to the primary) to others, even
+    from a page conditional() marked public.
+    """
+    def save_session(self, app, session, response):
+        if session.modified or self.should_set_cookie(app, session):
+            response.cache_control.public = False
+            response.cache_control.s_maxage = None
+            response.cache_control.private = True
+        super().save_session(app, session, response)
+
+def init_conditional(app):
+    app.session_interface = PrivateSessionInterface()
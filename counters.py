@@ -0,0 +1,159 @@
+import time
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from models import db, Venue, Artist, Show, ShowArchive
+from cache import cache
+from conditional import bump_listings
+
+#----------------------------------------------------------------------------#
+# Counters.
+#----------------------------------------------------------------------------#
+
+# Each counted model with the Show column that points at it.
+COUNTED = (
+    (Venue, Show.venue_id),
+    (Artist, Show.artist_id),
+)
+
+def record_show(show):
+    """ Account for a newly added show on its venue and artist.
+
+    Runs as UPDATE ... SET x = x + 1 in the caller's transaction, so
+    concurrent bookings don't overwrite each other's counts.
+    """
+    upcoming = show.start_time > datetime.now()
+    for model, show_key in COUNTED:
+        if upcoming:
+            values = {
+                model.upcoming_shows_count: model.upcoming_shows_count + 1,
+                model.next_show_time: db.func.least(model.next_show_time, show.start_time),
+            }
+        else:
+            values = {model.past_shows_count: model.past_shows_count + 1}
+
+        model.query.filter(
+            model.id == getattr(show, show_key.key)
+        ).update(values, synchronize_session=False)
+
+def recount(model, show_key, ids=None):
+    """ Recompute counters from Show and ShowArchive for the given ids of
+    `model` (all rows when None): one grouped aggregate over both, applied
+    with UPDATE ... FROM. Shows of soft-deleted venues and artists, waiting
+    for the purge, no longer count.
+    """
+    archive_key = getattr(ShowArchive, show_key.key)
+    deleted_venues = db.select(Venue.id).where(Venue.deleted_at.isnot(None))
+    deleted_artists = db.select(Artist.id).where(Artist.deleted_at.isnot(None))
+    live = db.select(show_key.label('id'), Show.start_time).where(
+        Show.venue_id.not_in(deleted_venues), Show.artist_id.not_in(deleted_artists)
+    )
+    archived = db.select(archive_key.label('id'), ShowArchive.start_time).where(
+        ShowArchive.venue_id.not_in(deleted_venues), ShowArchive.artist_id.not_in(deleted_artists)
+    )
+
+    reset = db.update(model).values(upcoming_shows_count=0, past_shows_count=0, next_show_time=None)
+    if ids is not None:
+        ids = list(ids)
+        live = live.where(show_key.in_(ids))
+        archived = archived.where(archive_key.in_(ids))
+        reset = reset.where(model.id.in_(ids))
+    shows = db.union_all(live, archived).subquery()
+
+    now = db.func.now()
+    totals = db.select(
+        shows.c.id,
+        db.func.count().filter(shows.c.start_time > now).label('upcoming'),
+        db.func.count().filter(shows.c.start_time <= now).label('past'),
+        db.func.min(shows.c.start_time).filter(shows.c.start_time > now).label('next_show_time'),
+    ).group_by(shows.c.id).subquery()
+
+    db.session.execute(reset.execution_options(synchronize_session=False))
+    db.session.execute(
+        db.update(model).where(model.id == totals.c.id).values(
+            upcoming_shows_count=totals.c.upcoming,
+            past_shows_count=totals.c.past,
+            next_show_time=totals.c.next_show_time,
+        ).execution_options(synchronize_session=False)
+    )
+
+def discount(model, show_key, owner_key, owner_id):
+    """ Take the shows and archived shows of one venue or artist (`owner_key`
+    == `owner_id`) off the counters of the `model` rows they involve, with
+    one grouped UPDATE ... FROM over those shows only. Rows whose next show
+    was one of them, or has started without a sweep since, are recounted.
+    Returns the ids of the rows updated.
+    """
+    archive_key = getattr(ShowArchive, show_key.key)
+    archive_owner = getattr(ShowArchive, owner_key.key)
+    shows = db.union_all(
+        db.select(show_key.label('id'), Show.start_time).where(owner_key == owner_id),
+        db.select(archive_key.label('id'), ShowArchive.start_time).where(archive_owner == owner_id),
+    ).subquery()
+
+    now = db.func.now()
+    totals = db.select(
+        shows.c.id,
+        db.func.count().filter(shows.c.start_time > now).label('upcoming'),
+        db.func.count().filter(shows.c.start_time <= now).label('past'),
+        db.func.min(shows.c.start_time).filter(shows.c.start_time > now).label('next_show_time'),
+    ).group_by(shows.c.id).subquery()
+
+    rows = db.session.execute(
+        db.update(model).where(model.id == totals.c.id).values(
+            upcoming_shows_count=model.upcoming_shows_count - totals.c.upcoming,
+            past_shows_count=model.past_shows_count - totals.c.past,
+        ).returning(model.id, db.or_(model.next_show_time == totals.c.next_show_time, model.next_show_time <= now))
+        .execution_options(synchronize_session=False)
+    ).all()
+    recount(model, show_key, [id for id, stale in rows if stale])
+    return {id for id, stale in rows}
+
+def count_tags(model, ids):
+    """ Cache tags of the pages showing the counts of `ids`: the listing
+    and search of their model and their own pages.
+    """
+    side = model.__tablename__.lower()
+    return [f'{side}s', *[f'{side}:{id}' for id in ids]]
+
+def sweep():
+    """ Roll counters forward for every entity whose next show has started. """
+    tags = []
+    for model, show_key in COUNTED:
+        ids = [id for id, in db.session.query(model.id).filter(model.next_show_time <= db.func.now())]
+        if ids:
+            recount(model, show_key, ids)
+            tags += count_tags(model, ids)
+    bump_listings(*tags)
+    db.session.commit()
+    cache.invalidate(*tags)
+
+def rebuild():
+    """ Recompute every counter; a maintenance job, so no statement timeout. """
+    db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+    for model, show_key in COUNTED:
+        recount(model, show_key)
+    bump_listings('venues', 'artists')
+    db.session.commit()
+    cache.invalidate('venues', 'artists')
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+counters_cli = AppGroup('counters', help='Maintain the denormalized show counters.')
+
+@counters_cli.command('sweep')
+@click.option('--every', type=int, default=0, help='Repeat every N seconds instead of running once.')
+def sweep_command(every):
+    """ Move shows that have started from upcoming to past. """
+    while True:
+        sweep()
+        if not every:
+            break
+        time.sleep(every)
+
+@counters_cli.command('rebuild')
+def rebuild_command():
+    """ Recompute every counter from the Show table and archive. """
+    rebuild()
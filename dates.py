@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+#----------------------------------------------------------------------------#
+# Formats.
+#----------------------------------------------------------------------------#
+
+# Named formats of the `datetime` template filter; anything else is taken as
+# a literal Babel pattern.
+FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+DEFAULT_LOCALE = 'en'
+
+@lru_cache(maxsize=64)
+def compiled_pattern(format, locale):
+    """ Parsed Babel pattern and locale for a (format, locale) pair. Parsing
+    both is most of the cost of babel.dates.format_datetime.
+    """
+    # Babel is imported on first use rather than at app startup.
+    import babel
+    import babel.dates
+    return babel.dates.parse_pattern(FORMATS.get(format, format)), babel.Locale.parse(locale)
+
+#----------------------------------------------------------------------------#
+# Formatting.
+#----------------------------------------------------------------------------#
+
+@lru_cache(maxsize=4096)
+def _format(value, format, locale):
+    pattern, locale = compiled_pattern(format, locale)
+    return pattern.apply(value, locale)
+
+def format_datetime(value, format='medium', locale=DEFAULT_LOCALE):
+    """ Format a datetime with a named format or Babel pattern.
+
+    Recently formatted (value, format, locale) triples are memoized, so a
+    page listing the same show times over and over formats each once.
+    Strings are still accepted and parsed for older callers.
+    """
+    if isinstance(value, str):
+        import dateutil.parser
+        value = dateutil.parser.parse(value)
+    return _format(value, format, locale)
+
+def format_datetimes(values, format='medium', locale=DEFAULT_LOCALE):
+    """ Format a whole list of datetimes at once, in order. """
+    formatted = {}
+    for value in values:
+        if value not in formatted:
+            formatted[value] = format_datetime(value, format, locale)
+    return [formatted[value] for value in values]
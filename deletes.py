@@ -0,0 +1,171 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db, Venue, Artist, Show, ShowArchive, ShowSlot, slot_key
+from queries import SHOW_SIDES
+from counters import recount, discount
+from matches import reindex
+from cache import cache
+from conditional import bump_listings
+
+#----------------------------------------------------------------------------#
+# Sides.
+#----------------------------------------------------------------------------#
+
+SIDES = {Venue: 'venue', Artist: 'artist'}
+
+def show_keys(model):
+    """ The Show and ShowArchive columns pointing at `model`, then at its
+    counterpart, and the counterpart model.
+    """
+    owner_key, other_name, other = SHOW_SIDES[SIDES[model]]
+    other_key = f'{other_name}_id'
+    return (
+        getattr(Show, owner_key), getattr(ShowArchive, owner_key),
+        getattr(Show, other_key), getattr(ShowArchive, other_key), other
+    )
+
+def delete_tags(model, entity_id, counterpart_ids=()):
+    # The counterparts' listing shows their counts.
+    other_name = SHOW_SIDES[SIDES[model]][1]
+    return [
+        f'{SIDES[model]}:{entity_id}', f'{SIDES[model]}s', 'shows',
+        *([f'{other_name}s'] if counterpart_ids else []),
+        *[f'{other_name}:{id}' for id in counterpart_ids]
+    ]
+
+def invalidate(model, entity_id, counterpart_ids=()):
+    cache.invalidate(*delete_tags(model, entity_id, counterpart_ids))
+
+#----------------------------------------------------------------------------#
+# Deletes.
+#----------------------------------------------------------------------------#
+
+def hard_delete(model, entity_id):
+    """ Delete a venue or artist with one statement: its shows, archived
+    shows and match index rows go through ON DELETE CASCADE. Returns the
+    counterparts it had shows with, recounted.
+    """
+    show_key, archive_key, other_key, other_archive_key, other = show_keys(model)
+    counterpart_ids = set(db.session.scalars(db.union(
+        db.select(other_key).where(show_key == entity_id),
+        db.select(other_archive_key).where(archive_key == entity_id),
+    )))
+    db.session.execute(db.delete(model).where(model.id == entity_id).execution_options(synchronize_session=False))
+    recount(other, getattr(Show, other_key.key), counterpart_ids)
+    return counterpart_ids
+
+def soft_delete(model, entity_id):
+    """ Hide a venue or artist at once, whatever its number of shows: mark
+    it deleted, free the slots of its shows for other bookings and drop it
+    from the match index. Its shows stay until purge() removes them in
+    batches, hidden meanwhile along with it. Returns the counterparts it had
+    shows with, their counts already without those shows.
+    """
+    show_key, archive_key, other_key, other_archive_key, other = show_keys(model)
+    marked = db.session.execute(
+        db.update(model).where(model.id == entity_id, model.deleted_at.is_(None))
+        .values(deleted_at=db.func.now()).execution_options(synchronize_session=False)
+    ).rowcount
+    if not marked:
+        # Already deleted: its shows are off the counts.
+        return set()
+    # Through the GiST index of the exclusion constraint.
+    slot_owner = getattr(ShowSlot, show_key.key)
+    db.session.execute(
+        db.delete(ShowSlot).where(slot_key(slot_owner).op('&&')(slot_key(db.literal(entity_id))))
+        .execution_options(synchronize_session=False)
+    )
+    # Also touches their updated_at, so their pages revalidate.
+    counterpart_ids = discount(other, getattr(Show, other_key.key), show_key, entity_id)
+    reindex(model, [entity_id])
+    return counterpart_ids
+
+def delete(model, entity_id):
+    """ Delete per SOFT_DELETE, in the caller's transaction, and bump the
+    listings it changes; commit right after. Returns the counterparts whose
+    pages changed.
+    """
+    if current_app.config.get('SOFT_DELETE', True):
+        counterpart_ids = soft_delete(model, entity_id)
+    else:
+        counterpart_ids = hard_delete(model, entity_id)
+    bump_listings(*delete_tags(model, entity_id, counterpart_ids))
+    return counterpart_ids
+
+#----------------------------------------------------------------------------#
+# Purge.
+#----------------------------------------------------------------------------#
+
+def purge_batch(model, entity_id, batch_size):
+    """ Delete up to `batch_size` shows, then archived shows, of a
+    soft-deleted entity and recount the counterparts they involved; once
+    none are left, delete the entity itself. Returns those counterparts'
+    ids, or None when the entity is gone.
+    """
+    show_key, archive_key, other_key, other_archive_key, other = show_keys(model)
+    rows = db.session.scalars(
+        db.delete(Show).where(db.tuple_(Show.id, Show.start_time).in_(
+            db.select(Show.id, Show.start_time).where(show_key == entity_id).limit(batch_size)
+        )).returning(other_key).execution_options(synchronize_session=False)
+    ).all()
+    if not rows:
+        rows = db.session.scalars(
+            db.delete(ShowArchive).where(ShowArchive.id.in_(
+                db.select(ShowArchive.id).where(archive_key == entity_id).limit(batch_size)
+            )).returning(other_archive_key).execution_options(synchronize_session=False)
+        ).all()
+    if not rows:
+        db.session.execute(
+            db.delete(model).where(model.id == entity_id, model.deleted_at.isnot(None))
+            .execution_options(synchronize_session=False)
+        )
+        return None
+
+    counterpart_ids = set(rows)
+    recount(other, getattr(Show, other_key.key), counterpart_ids)
+    return counterpart_ids
+
+def purge(batch_size=1000, pause=0):
+    """ Remove every soft-deleted venue and artist, one batch per
+    transaction so no statement runs or holds its locks for long. Returns
+    the number of entities removed.
+    """
+    removed = 0
+    for model in SIDES:
+        pending = db.session.scalars(
+            db.select(model.id).where(model.deleted_at.isnot(None)).order_by(model.deleted_at)
+            .execution_options(include_deleted=True)
+        ).all()
+        for entity_id in pending:
+            while True:
+                counterpart_ids = purge_batch(model, entity_id, batch_size)
+                bump_listings(*delete_tags(model, entity_id, counterpart_ids or ()))
+                db.session.commit()
+                invalidate(model, entity_id, counterpart_ids or ())
+                if counterpart_ids is None:
+                    removed += 1
+                    break
+                time.sleep(pause)
+    return removed
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+deleted_cli = AppGroup('deleted', help='Purge soft-deleted venues and artists.')
+
+@deleted_cli.command('purge')
+@click.option('--batch-size', default=1000, show_default=True, help='Shows deleted per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to wait between batches.')
+@click.option('--every', type=int, default=0, help='Repeat every N seconds instead of running once.')
+def purge_command(batch_size, pause, every):
+    """ Delete soft-deleted venues and artists with their shows. """
+    while True:
+        removed = purge(batch_size, pause)
+        if removed:
+            click.echo(f'Purged {removed} venues/artists.', err=True)
+        if not every:
+            break
+        time.sleep(every)
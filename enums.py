@@ -25,6 +25,11 @@ class Genre(enum.Enum):
     def choices(cls):
         return [(choice.name, choice.value) for choice in cls]
 
+# Genres are stored by code, their position above (see models.GenreList):
+# append new genres at the end, never insert, remove or reorder them.
+GENRE_CODES = {genre.name: code for code, genre in enumerate(Genre)}
+GENRES_BY_CODE = [genre.name for genre in Genre]
+
 class State(enum.Enum):
     AL = 'AL'
     AK = 'AK'
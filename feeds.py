@@ -0,0 +1,168 @@
+from datetime import timedelta
+from functools import lru_cache
+from flask import Blueprint, current_app, abort, stream_with_context
+from enums import State
+from models import db, Venue, Artist, Show
+from conditional import conditional, utc, venue_state, artist_state, city_state
+
+#----------------------------------------------------------------------------#
+# Rows.
+#----------------------------------------------------------------------------#
+
+def feed_statement(*criteria):
+    """ Upcoming shows matching `criteria`, soonest first, with what a feed
+    entry says about their venue and artist.
+    """
+    return db.select(
+        Show.id,
+        Show.start_time,
+        Show.duration,
+        # DTSTAMP is in UTC.
+        utc(Show.updated_at).label('updated_at'),
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.address.label('venue_address'),
+        Venue.city.label('venue_city'),
+        Venue.state.label('venue_state'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+    ).join(
+        Venue, Venue.id == Show.venue_id
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    ).where(
+        Show.start_time > db.func.now(), *criteria
+    ).order_by(
+        Show.start_time, Show.id
+    )
+
+def stream_feed(statement, render, head='', tail=''):
+    """ The feed body, FEED_BATCH_SIZE shows at a time: rows come from a
+    server-side cursor and each batch is written out as one chunk, so
+    memory stays flat however many shows there are.
+    """
+    batch_size = current_app.config.get('FEED_BATCH_SIZE', 500)
+
+    def generate():
+        yield head
+        result = db.session.execute(statement.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield ''.join(render(row) for row in rows)
+        yield tail
+
+    # Keeps the request, and with it the session and its cursor, open
+    # until the last chunk is sent.
+    return stream_with_context(generate())
+
+#----------------------------------------------------------------------------#
+# iCalendar.
+#----------------------------------------------------------------------------#
+
+# A feed repeats the same venues and artists over and over.
+@lru_cache(maxsize=4096)
+def ics_text(value):
+    """ Escape a TEXT value (RFC 5545, 3.3.11). """
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def ics_line(name, value):
+    """ A content line, folded into lines of at most 75 octets. """
+    line = f'{name}:{value}'
+    if len(line.encode()) <= 75:
+        return line + '\r\n'
+    lines, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            lines.append(current)
+            current, size = ' ', 1
+        current += char
+        size += width
+    lines.append(current)
+    return '\r\n'.join(lines) + '\r\n'
+
+def ics_time(value):
+    # Show times are local to the venue and stored without a zone, so they
+    # go out as floating times. isoformat() is several times faster than
+    # strftime().
+    return value.isoformat(timespec='seconds').replace('-', '').replace(':', '')
+
+def ics_event(row):
+    # DTSTAMP is when the show last changed rather than when the feed was
+    # generated, so an unchanged feed is byte for byte the same.
+    return ''.join((
+        'BEGIN:VEVENT\r\n',
+        ics_line('UID', f'show-{row.id}@fyyur'),
+        ics_line('DTSTAMP', ics_time(row.updated_at) + 'Z'),
+        ics_line('DTSTART', ics_time(row.start_time)),
+        ics_line('DTEND', ics_time(row.start_time + timedelta(minutes=row.duration))),
+        ics_line('SUMMARY', ics_text(f'{row.artist_name} at {row.venue_name}')),
+        ics_line('LOCATION', ics_text(f'{row.venue_name}, {row.venue_address}, {row.venue_city}, {row.venue_state}')),
+        'END:VEVENT\r\n',
+    ))
+
+def ics_response(name, statement):
+    head = ''.join((
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        'PRODID:-//Fyyur//Upcoming shows//EN\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        ics_line('X-WR-CALNAME', ics_text(f'Fyyur: {name}')),
+    ))
+    return current_app.response_class(
+        stream_feed(statement, ics_event, head, 'END:VCALENDAR\r\n'),
+        mimetype='text/calendar'
+    )
+
+#----------------------------------------------------------------------------#
+# NDJSON.
+#----------------------------------------------------------------------------#
+
+def ndjson_show(row):
+    return current_app.json.dumps({
+        'id': row.id,
+        'start_time': row.start_time.isoformat(),
+        'end_time': (row.start_time + timedelta(minutes=row.duration)).isoformat(),
+        'venue_id': row.venue_id,
+        'venue_name': row.venue_name,
+        'venue_address': row.venue_address,
+        'artist_id': row.artist_id,
+        'artist_name': row.artist_name,
+        'artist_image_link': row.artist_image_link,
+    }) + '\n'
+
+#----------------------------------------------------------------------------#
+# Blueprint.
+#----------------------------------------------------------------------------#
+
+# Feeds of upcoming shows for partners that would otherwise poll the detail
+# pages. Each is validated like those pages, from updated_at columns before
+# any show is read, so polling an unchanged feed costs one indexed lookup
+# and a 304.
+bp = Blueprint('feeds', __name__)
+
+#  Venue Calendar
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/shows.ics')
+@conditional(venue_state)
+def venue_calendar(venue_id):
+    name = db.first_or_404(db.select(Venue.name).where(Venue.id == venue_id))
+    return ics_response(name, feed_statement(Show.venue_id == venue_id))
+
+#  Artist Calendar
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/shows.ics')
+@conditional(artist_state)
+def artist_calendar(artist_id):
+    name = db.first_or_404(db.select(Artist.name).where(Artist.id == artist_id))
+    return ics_response(name, feed_statement(Show.artist_id == artist_id))
+
+#  City Feed
+#  ----------------------------------------------------------------
+@bp.route('/cities/<state>/<city>/shows.ndjson')
+@conditional(city_state)
+def city_feed(state, city):
+    if state not in State.__members__:
+        abort(404)
+    statement = feed_statement(Venue.city == city, Venue.state == state)
+    return current_app.response_class(stream_feed(statement, ndjson_show), mimetype='application/x-ndjson')
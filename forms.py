@@ -1,10 +1,17 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL, Optional, Regexp
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, Optional, Regexp, NumberRange
 from enums import Genre, State
+from models import SHOW_DURATION
 import re
 
+# Built once; every form instance and validate() call shares them.
+GENRE_CHOICES = Genre.choices()
+STATE_CHOICES = State.choices()
+GENRE_NAMES = frozenset(name for name, label in GENRE_CHOICES)
+STATE_NAMES = frozenset(name for name, label in STATE_CHOICES)
+
 class ShowForm(FlaskForm):
     artist_id = StringField(
         'artist_id', validators=[DataRequired()]
@@ -17,6 +24,10 @@ class ShowForm(FlaskForm):
         validators=[DataRequired()],
         default= datetime.today()
     )
+    duration = IntegerField(
+        'duration', validators=[Optional(), NumberRange(min=1, max=24 * 60)],
+        default=SHOW_DURATION
+    )
 
 class VenueForm(FlaskForm):
     name = StringField(
@@ -27,7 +38,7 @@ class VenueForm(FlaskForm):
     )
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=State.choices()
+        choices=STATE_CHOICES
     )
     address = StringField(
         'address', validators=[DataRequired()]
@@ -40,7 +51,7 @@ class VenueForm(FlaskForm):
     )
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=Genre.choices()
+        choices=GENRE_CHOICES
     )
     facebook_link = StringField(
         'facebook_link', validators=[URL(), Optional()]
@@ -65,11 +76,11 @@ class VenueForm(FlaskForm):
             self.phone.errors.append('Invalid phone.')
             return False
 
-        if not set(self.genres.data).issubset(dict(Genre.choices()).keys()):
+        if not GENRE_NAMES.issuperset(self.genres.data):
             self.genres.errors.append('Invalid genres.')
             return False
 
-        if self.state.data not in dict(State.choices()).keys():
+        if self.state.data not in STATE_NAMES:
             self.state.errors.append('Invalid state.')
             return False
 
@@ -84,7 +95,7 @@ class ArtistForm(FlaskForm):
     )
     state = SelectField(
         'state', validators=[DataRequired()],
-        choices=State.choices()
+        choices=STATE_CHOICES
     )
     phone = StringField(
         'phone'
@@ -94,7 +105,7 @@ class ArtistForm(FlaskForm):
     )
     genres = SelectMultipleField(
         'genres', validators=[DataRequired()],
-        choices=Genre.choices()
+        choices=GENRE_CHOICES
     )
     facebook_link = StringField(
         'facebook_link', validators=[URL(), Optional()]
@@ -119,11 +130,11 @@ class ArtistForm(FlaskForm):
             self.phone.errors.append('Invalid phone.')
             return False
 
-        if not set(self.genres.data).issubset(dict(Genre.choices()).keys()):
+        if not GENRE_NAMES.issuperset(self.genres.data):
             self.genres.errors.append('Invalid genres.')
             return False
 
-        if self.state.data not in dict(State.choices()).keys():
+        if self.state.data not in STATE_NAMES:
             self.state.errors.append('Invalid state.')
             return False
 
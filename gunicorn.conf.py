@@ -0,0 +1,65 @@
+""" Gunicorn settings for production, read from the environment. Gunicorn
+loads this file by default when started from the project directory:
+
+    gunicorn wsgi:app
+
+WEB_WORKER_CLASS picks the worker model:
+- gthread (default): WEB_THREADS threads per worker, for the HTML views;
+- gevent: WEB_WORKER_CONNECTIONS cooperative connections per worker, for
+  the JSON API under many keep-alive clients;
+- sync: one request at a time per worker.
+
+The app is preloaded in the master and forked, so workers share its
+memory copy-on-write (not with gevent, which must patch the standard
+library before the app is imported). Workers are recycled after about
+WEB_MAX_REQUESTS requests. `kill -HUP <master>` replaces the workers
+gracefully; with a preloaded app, deploy new code with `kill -USR2` and
+then `kill -QUIT` the old master.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND') or f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 1000))
+preload_app = os.environ.get('WEB_PRELOAD', '1') == '1' and worker_class != 'gevent'
+
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+# One pooled connection per request a worker can serve at once, unless set
+# explicitly; gevent workers keep config.py's default, which bounds how
+# many of their connections query at once.
+if worker_class == 'gthread':
+    os.environ.setdefault('DB_POOL_SIZE', str(threads))
+elif worker_class == 'sync':
+    os.environ.setdefault('DB_POOL_SIZE', '1')
+
+def when_ready(server):
+    # Keep the preloaded app's objects out of the collector's generations,
+    # so collections in the workers do not write to (and copy) them.
+    if preload_app:
+        gc.freeze()
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    elif preload_app:
+        # Connections must not be shared across processes; start each
+        # worker with empty pools.
+        from wsgi import app
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
@@ -0,0 +1,20 @@
+""" Gunicorn settings for the read-only JSON API tier.
+
+    gunicorn -c gunicorn_api.conf.py wsgi:app
+
+gunicorn.conf.py with gevent workers, which multiplex thousands of
+keep-alive connections per process. psycopg2 is made cooperative, so a
+request waiting on Postgres yields to the others instead of blocking its
+worker; DB_POOL_SIZE still bounds how many of them query at once.
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('WEB_BIND', os.environ.get('API_BIND', '0.0.0.0:8001'))
+os.environ.setdefault('WEB_WORKERS', os.environ.get('API_WORKERS', str(multiprocessing.cpu_count())))
+os.environ.setdefault('WEB_WORKER_CLASS', 'gevent')
+os.environ.setdefault('WEB_WORKER_CONNECTIONS', os.environ.get('API_WORKER_CONNECTIONS', '2000'))
+os.environ.setdefault('WEB_KEEPALIVE', '75')
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')) as f:
+    exec(f.read())
@@ -0,0 +1,136 @@
+import hmac
+import threading
+import time
+from flask import current_app, g, has_app_context, request, jsonify, abort
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db
+
+#----------------------------------------------------------------------------#
+# Statement hooks.
+#----------------------------------------------------------------------------#
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+    if context is not None:
+        context.query_timed = True
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # so later statements on this pooled connection are timed from theirs.
+    if getattr(context.execution_context, 'query_timed', False):
+        context.connection.info['query_start'].pop()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if not has_app_context():
+        return
+    stats = g.get('db_stats')
+    if stats is None:
+        return
+    stats['queries'] += 1
+    stats['db_time'] += elapsed
+    if elapsed > stats['slowest_time']:
+        stats['slowest_time'] = elapsed
+        stats['slowest'] = statement
+
+#----------------------------------------------------------------------------#
+# Instrumentation.
+#----------------------------------------------------------------------------#
+
+def metrics_allowed():
+    """ Whether the request carries METRICS_TOKEN as a bearer token; never
+    when none is configured.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return False
+    scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(given.encode(), token.encode())
+
+class DBInstrumentation:
+    """ Per-request query count, DB time and slowest statement, from engine
+    events. Requests over SLOW_REQUEST_MS are logged, and aggregates are
+    served at /internal/metrics to callers with METRICS_TOKEN. Those, and
+    everyone in debug mode, also get a Server-Timing header.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Listening on the Engine class covers every bind the app creates.
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/internal/metrics', 'metrics', self.metrics)
+
+    def _start_request(self):
+        g.db_stats = {
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db_time': 0.0,
+            'slowest_time': 0.0,
+            'slowest': None,
+        }
+
+    def _finish_request(self, response):
+        stats = g.get('db_stats')
+        if stats is None:
+            return response
+
+        duration_ms = (time.perf_counter() - stats['start']) * 1000
+        db_time_ms = stats['db_time'] * 1000
+        if current_app.debug or metrics_allowed():
+            response.headers['Server-Timing'] = f'db;dur={db_time_ms:.1f}, app;dur={duration_ms:.1f}'
+
+        endpoint = request.endpoint or 'unknown'
+        with self._lock:
+            totals = self.endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'queries': 0,
+                'db_time_ms': 0.0,
+                'max_queries': 0,
+                'max_duration_ms': 0.0,
+            })
+            totals['requests'] += 1
+            totals['queries'] += stats['queries']
+            totals['db_time_ms'] += db_time_ms
+            totals['max_queries'] = max(totals['max_queries'], stats['queries'])
+            totals['max_duration_ms'] = max(totals['max_duration_ms'], duration_ms)
+
+        if duration_ms > current_app.config.get('SLOW_REQUEST_MS', 500):
+            current_app.logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB, slowest %.1f ms: %s',
+                request.method, request.path, duration_ms, stats['queries'], db_time_ms,
+                stats['slowest_time'] * 1000, stats['slowest']
+            )
+
+        return response
+
+    def pool_stats(self):
+        pools = {}
+        for bind, engine in db.engines.items():
+            pool = engine.pool
+            stats = {'status': pool.status()}
+            for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+                if hasattr(pool, name):
+                    stats[name] = getattr(pool, name)()
+            pools[bind or 'default'] = stats
+        return pools
+
+    def metrics(self):
+        if not metrics_allowed():
+            abort(404)
+        with self._lock:
+            endpoints = {name: dict(totals) for name, totals in self.endpoints.items()}
+        return jsonify({'pools': self.pool_stats(), 'endpoints': endpoints})
+
+instrumentation = DBInstrumentation()
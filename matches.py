@@ -0,0 +1,134 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db, Venue, Artist, VenueMatch, ArtistMatch
+
+#----------------------------------------------------------------------------#
+# Index.
+#----------------------------------------------------------------------------#
+
+# Each side with its index table, the table's owner column and the flag
+# that puts an entity in the index.
+MATCH_SIDES = {
+    Venue: (VenueMatch, VenueMatch.venue_id, Venue.seeking_talent),
+    Artist: (ArtistMatch, ArtistMatch.artist_id, Artist.seeking_venue),
+}
+COUNTERPARTS = {Venue: Artist, Artist: Venue}
+
+def match_city(city):
+    """ City as keyed in the index, so 'New York ' and 'new york' meet. """
+    return db.func.lower(db.func.trim(city))
+
+def reindex(model, ids=None):
+    """ Replace the index rows of the given venues or artists (all of them
+    when None) from their current state, city, genres and seeking flag, in
+    the caller's transaction. Soft-deleted ones are left out.
+    """
+    index, owner, seeking = MATCH_SIDES[model]
+    db.session.flush()
+
+    delete = db.delete(index)
+    keys = db.select(
+        model.state, match_city(model.city), db.func.unnest(model.genres), model.id
+    ).where(seeking.is_(True), model.deleted_at.is_(None)).distinct()
+    if ids is not None:
+        ids = list(ids)
+        delete = delete.where(owner.in_(ids))
+        keys = keys.where(model.id.in_(ids))
+
+    db.session.execute(delete.execution_options(synchronize_session=False))
+    db.session.execute(db.insert(index).from_select(['state', 'city', 'genre', owner.key], keys))
+
+#----------------------------------------------------------------------------#
+# Lookup.
+#----------------------------------------------------------------------------#
+
+def match_statement(model):
+    """ The lookup for one side, with `entity_id` and `limit` as bind
+    parameters.
+    """
+    other = COUNTERPARTS[model]
+    index, owner, seeking = MATCH_SIDES[other]
+
+    keys = db.select(
+        model.state.label('state'),
+        match_city(model.city).label('city'),
+        db.func.unnest(model.genres).label('genre')
+    ).where(model.id == db.bindparam('entity_id'), model.deleted_at.is_(None)).cte('keys')
+    hits = db.select(owner.label('id'), db.func.count().label('shared')).select_from(keys).join(
+        index, db.and_(index.state == keys.c.state, index.city == keys.c.city, index.genre == keys.c.genre)
+    ).group_by(owner).subquery('hits')
+
+    return db.select(
+        other.id,
+        other.name,
+        other.city,
+        other.state,
+        other.genres,
+        other.upcoming_shows_count.label('num_upcoming_shows'),
+        hits.c.shared
+    ).join(hits, hits.c.id == other.id).order_by(
+        hits.c.shared.desc(), other.upcoming_shows_count.desc(), other.id
+    ).limit(db.bindparam('limit'))
+
+def prepared_match(model):
+    """ The server-side prepared statement of the lookup for one side, built
+    once: its name, the PREPARE ... AS text with `entity_id` and `limit` as
+    $1 and $2, and the EXECUTE returning the lookup's columns.
+    """
+    statement = match_statement(model)
+    name = f'match_{model.__tablename__.lower()}'
+    sql = statement.compile(dialect=db.engine.dialect).string % {'entity_id': '$1', 'limit': '$2'}
+    execute = db.text(f'EXECUTE {name}(:entity_id, :limit)').columns(
+        **{column.name: column.type for column in statement.selected_columns}
+    )
+    return statement, name, f'PREPARE {name} AS {sql}', execute
+
+MATCH_STATEMENTS = {}
+
+def find_matches(model, entity_id, limit=None):
+    """ Ranked counterparts of a venue (artists) or an artist (venues):
+    those seeking, in the same city and state, sharing at least one genre.
+    Most genres in common first, then the busiest.
+
+    The entity's own (state, city, genre) keys are probed in the other
+    side's index, so the cost depends on how many entities share those
+    keys, not on the size of the tables. The entity itself need not be
+    seeking.
+
+    The lookup is prepared once per database connection, the first time
+    it runs there, and executed from then on: planning the join took as
+    long as running it. It runs on the session's connection, replica
+    included, outside the ORM events; the index holds no deleted entity.
+    """
+    if limit is None:
+        limit = current_app.config.get('MATCH_LIMIT', 20)
+    if model not in MATCH_STATEMENTS:
+        MATCH_STATEMENTS[model] = prepared_match(model)
+    statement, name, prepare, execute = MATCH_STATEMENTS[model]
+
+    connection = db.session.connection(bind_arguments={'clause': statement})
+    # Prepared statements last as long as the database session, which
+    # the pool keeps as long as this info dict.
+    prepared = connection.info.setdefault('prepared', set())
+    if name not in prepared:
+        connection.exec_driver_sql(prepare)
+        prepared.add(name)
+    return connection.execute(execute, {'entity_id': entity_id, 'limit': limit}).all()
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+matches_cli = AppGroup('matches', help='Maintain the artist/venue match index.')
+
+@matches_cli.command('rebuild')
+def rebuild_command():
+    """ Rebuild the match index from every venue and artist. """
+    start = time.perf_counter()
+    db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+    for model in MATCH_SIDES:
+        reindex(model)
+    db.session.commit()
+    click.echo(f'Rebuilt the match index in {time.perf_counter() - start:.1f}s.')
@@ -0,0 +1,82 @@
+"""genres stored as smallint codes
+
+Revision ID: 3f9a6c1e2b47
+Revises: 5d0e8b7a6f21
+Create Date: 2026-10-18 09:41:27.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a6c1e2b47'
+down_revision = '5d0e8b7a6f21'
+branch_labels = None
+depends_on = None
+
+# enums.Genre at this revision: (name, label), in code order.
+GENRES = [
+    ('Alternative', 'Alternative'), ('Blues', 'Blues'), ('Classical', 'Classical'),
+    ('Country', 'Country'), ('Electronic', 'Electronic'), ('Folk', 'Folk'), ('Funk', 'Funk'),
+    ('Hip_Hop', 'Hip-Hop'), ('Heavy_Metal', 'Heavy Metal'), ('Instrumental', 'Instrumental'),
+    ('Jazz', 'Jazz'), ('Musical_Theatre', 'Musical Theatre'), ('Pop', 'Pop'), ('Punk', 'Punk'),
+    ('R_B', 'R&B'), ('Reggae', 'Reggae'), ('Rock_n_Roll', 'Rock n Roll'), ('Soul', 'Soul'),
+    ('Other', 'Other'),
+]
+
+
+def text_array(values):
+    return "ARRAY[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]::text[]"
+
+
+def upgrade():
+    names = text_array(name for name, label in GENRES)
+    labels = text_array(label for name, label in GENRES)
+    other = [name for name, label in GENRES].index('Other')
+    # Rows written outside the forms may hold labels; anything unknown
+    # becomes Other.
+    op.execute(f"""
+        CREATE FUNCTION pg_temp.genre_codes(genres varchar[]) RETURNS smallint[]
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(array_agg(coalesce(
+                array_position({names}, genre::text) - 1,
+                array_position({labels}, genre::text) - 1,
+                {other}
+            )::smallint ORDER BY position), '{{}}')
+            FROM unnest(genres) WITH ORDINALITY AS genre_list(genre, position)
+        $$
+    """)
+
+    for table in ('Venue', 'Artist'):
+        op.drop_index(f'ix_{table}_genres', table_name=table, postgresql_using='gin')
+        op.alter_column(
+            table, 'genres',
+            type_=sa.ARRAY(sa.SmallInteger()),
+            existing_nullable=False,
+            postgresql_using='pg_temp.genre_codes(genres)'
+        )
+        op.create_index(f'ix_{table}_genres', table, ['genres'], unique=False, postgresql_using='gin')
+        op.create_index(f'ix_{table}_state', table, ['state'], unique=False)
+
+
+def downgrade():
+    names = text_array(name for name, label in GENRES)
+    op.execute(f"""
+        CREATE FUNCTION pg_temp.genre_names(codes smallint[]) RETURNS varchar[]
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(array_agg(({names})[code + 1] ORDER BY position), '{{}}')
+            FROM unnest(codes) WITH ORDINALITY AS code_list(code, position)
+        $$
+    """)
+
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_state', table_name=table)
+        op.drop_index(f'ix_{table}_genres', table_name=table, postgresql_using='gin')
+        op.alter_column(
+            table, 'genres',
+            type_=sa.ARRAY(sa.String()),
+            existing_nullable=False,
+            postgresql_using='pg_temp.genre_names(genres)'
+        )
+        op.create_index(f'ix_{table}_genres', table, ['genres'], unique=False, postgresql_using='gin')
@@ -0,0 +1,42 @@
+"""updated_at tracking for conditional GETs
+
+Revision ID: 5d0e8b7a6f21
+Revises: c41f7a2d9b83
+Create Date: 2026-10-17 22:05:13.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0e8b7a6f21'
+down_revision = 'c41f7a2d9b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        batch_op.create_index('ix_Artist_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        batch_op.create_index('ix_Venue_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_Venue_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.drop_index('ix_Artist_updated_at')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,56 @@
+"""hot path indexes and unique show booking
+
+Revision ID: 9ce2135ee216
+Revises: b7c2e9d4f015
+Create Date: 2026-10-17 18:39:00.546983
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9ce2135ee216'
+down_revision = 'b7c2e9d4f015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.create_index('ix_Artist_next_show_time', ['next_show_time'], unique=False, postgresql_where=sa.text('next_show_time IS NOT NULL'))
+
+    # Bookings made before the constraint existed may contain duplicates;
+    # keep the oldest row of each.
+    op.execute('''
+        DELETE FROM "Show" a USING "Show" b
+        WHERE a.artist_id = b.artist_id
+          AND a.venue_id = b.venue_id
+          AND a.start_time = b.start_time
+          AND a.id > b.id
+    ''')
+
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.create_index('ix_Show_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+        batch_op.create_index('ix_Show_start_time_id', ['start_time', 'id'], unique=False)
+        batch_op.create_index('ix_Show_venue_id_start_time', ['venue_id', 'start_time'], unique=False)
+        batch_op.create_unique_constraint('uq_Show_artist_id_venue_id_start_time', ['artist_id', 'venue_id', 'start_time'])
+
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.create_index('ix_Venue_city_state_id', ['city', 'state', 'id'], unique=False)
+        batch_op.create_index('ix_Venue_next_show_time', ['next_show_time'], unique=False, postgresql_where=sa.text('next_show_time IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_Venue_next_show_time', postgresql_where=sa.text('next_show_time IS NOT NULL'))
+        batch_op.drop_index('ix_Venue_city_state_id')
+
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_Show_artist_id_venue_id_start_time', type_='unique')
+        batch_op.drop_index('ix_Show_venue_id_start_time')
+        batch_op.drop_index('ix_Show_start_time_id')
+        batch_op.drop_index('ix_Show_artist_id_start_time')
+
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.drop_index('ix_Artist_next_show_time', postgresql_where=sa.text('next_show_time IS NOT NULL'))
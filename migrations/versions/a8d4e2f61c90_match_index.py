@@ -0,0 +1,61 @@
+"""match index of seeking venues and artists
+
+Revision ID: a8d4e2f61c90
+Revises: 3f9a6c1e2b47
+Create Date: 2026-10-18 14:12:51.640937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4e2f61c90'
+down_revision = '3f9a6c1e2b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('VenueMatch',
+    sa.Column('state', sa.String(length=120), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('genre', sa.SmallInteger(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('state', 'city', 'genre', 'venue_id')
+    )
+    with op.batch_alter_table('VenueMatch', schema=None) as batch_op:
+        batch_op.create_index('ix_VenueMatch_venue_id', ['venue_id'], unique=False)
+
+    op.create_table('ArtistMatch',
+    sa.Column('state', sa.String(length=120), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('genre', sa.SmallInteger(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('state', 'city', 'genre', 'artist_id')
+    )
+    with op.batch_alter_table('ArtistMatch', schema=None) as batch_op:
+        batch_op.create_index('ix_ArtistMatch_artist_id', ['artist_id'], unique=False)
+
+    # Same as matches.reindex() over every row.
+    op.execute("""
+        INSERT INTO "VenueMatch" (state, city, genre, venue_id)
+        SELECT DISTINCT state, lower(trim(city)), unnest(genres), id FROM "Venue" WHERE seeking_talent IS TRUE
+    """)
+    op.execute("""
+        INSERT INTO "ArtistMatch" (state, city, genre, artist_id)
+        SELECT DISTINCT state, lower(trim(city)), unnest(genres), id FROM "Artist" WHERE seeking_venue IS TRUE
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('ArtistMatch', schema=None) as batch_op:
+        batch_op.drop_index('ix_ArtistMatch_artist_id')
+
+    op.drop_table('ArtistMatch')
+    with op.batch_alter_table('VenueMatch', schema=None) as batch_op:
+        batch_op.drop_index('ix_VenueMatch_venue_id')
+
+    op.drop_table('VenueMatch')
@@ -0,0 +1,57 @@
+"""search indexes and show counters
+
+Revision ID: b7c2e9d4f015
+Revises: 86bc20c3fc0b
+Create Date: 2026-10-17 18:31:12.402157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c2e9d4f015'
+down_revision = '86bc20c3fc0b'
+branch_labels = None
+depends_on = None
+
+SEARCH = "to_tsvector('simple'::regconfig, name || ' ' || city || ' ' || state)"
+
+
+# Databases built from an earlier copy of the initial schema already have
+# these, so every step tolerates them.
+def upgrade():
+    for table, side in (('Venue', 'venue'), ('Artist', 'artist')):
+        op.execute(f"""
+            ALTER TABLE "{table}"
+                ADD COLUMN IF NOT EXISTS upcoming_shows_count INTEGER DEFAULT '0' NOT NULL,
+                ADD COLUMN IF NOT EXISTS past_shows_count INTEGER DEFAULT '0' NOT NULL,
+                ADD COLUMN IF NOT EXISTS next_show_time TIMESTAMP WITHOUT TIME ZONE
+        """)
+        op.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_genres" ON "{table}" USING gin (genres)')
+        op.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_search" ON "{table}" USING gin ({SEARCH})')
+        op.execute(f"""
+            UPDATE "{table}" SET
+                upcoming_shows_count = counts.upcoming,
+                past_shows_count = counts.past,
+                next_show_time = counts.next_time
+            FROM (
+                SELECT {side}_id,
+                    count(*) FILTER (WHERE start_time > now()) AS upcoming,
+                    count(*) FILTER (WHERE start_time <= now()) AS past,
+                    min(start_time) FILTER (WHERE start_time > now()) AS next_time
+                FROM "Show"
+                GROUP BY {side}_id
+            ) AS counts
+            WHERE counts.{side}_id = "{table}".id
+        """)
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_search', postgresql_using='gin')
+            batch_op.drop_index(f'ix_{table}_genres', postgresql_using='gin')
+            batch_op.drop_column('next_show_time')
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
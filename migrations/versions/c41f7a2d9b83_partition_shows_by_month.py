@@ -0,0 +1,129 @@
+"""partition shows by month and add the show archive
+
+Revision ID: c41f7a2d9b83
+Revises: 9ce2135ee216
+Create Date: 2026-10-17 21:12:40.118204
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a2d9b83'
+down_revision = '9ce2135ee216'
+branch_labels = None
+depends_on = None
+
+
+def add_months(day, months):
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def create_show_indexes(table):
+    op.create_index(f'ix_{table}_artist_id_start_time', table, ['artist_id', 'start_time'], unique=False)
+    op.create_index(f'ix_{table}_start_time_id', table, ['start_time', 'id'], unique=False)
+    op.create_index(f'ix_{table}_venue_id_start_time', table, ['venue_id', 'start_time'], unique=False)
+
+
+def drop_show_indexes(table):
+    op.drop_index(f'ix_{table}_venue_id_start_time', table_name=table)
+    op.drop_index(f'ix_{table}_start_time_id', table_name=table)
+    op.drop_index(f'ix_{table}_artist_id_start_time', table_name=table)
+
+
+def upgrade():
+    # A table can't be turned into a partitioned one in place: move the old
+    # one aside, freeing its index names, and copy the rows over.
+    op.rename_table('Show', 'Show_unpartitioned')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_unpartitioned_pkey"')
+    op.drop_constraint('uq_Show_artist_id_venue_id_start_time', 'Show_unpartitioned', type_='unique')
+    drop_show_indexes('Show')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+    op.create_table('Show',
+    sa.Column('id', sa.Integer(), server_default=sa.text('nextval(\'"Show_id_seq"\'::regclass)'), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    sa.PrimaryKeyConstraint('id', 'start_time'),
+    sa.UniqueConstraint('artist_id', 'venue_id', 'start_time', name='uq_Show_artist_id_venue_id_start_time'),
+    postgresql_partition_by='RANGE (start_time)'
+    )
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    create_show_indexes('Show')
+
+    # One partition per month holding shows, up to a year ahead; later
+    # months are added by `flask shows partitions`.
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+    first, last = op.get_bind().execute(
+        sa.text('SELECT min(start_time), max(start_time) FROM "Show_unpartitioned"')
+    ).one()
+    month = add_months(first or date.today(), 0)
+    last = max(add_months(last or date.today(), 0), add_months(date.today(), 12))
+    while month <= last:
+        op.execute(
+            f'CREATE TABLE "Show_{month:%Y_%m}" PARTITION OF "Show" '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute('''
+        INSERT INTO "Show" (id, artist_id, venue_id, start_time)
+        SELECT id, artist_id, venue_id, start_time FROM "Show_unpartitioned"
+    ''')
+    op.drop_table('Show_unpartitioned')
+
+    op.create_table('ShowArchive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ShowArchive', schema=None) as batch_op:
+        batch_op.create_index('ix_ShowArchive_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+        batch_op.create_index('ix_ShowArchive_start_time', ['start_time'], unique=False, postgresql_using='brin')
+        batch_op.create_index('ix_ShowArchive_venue_id_start_time', ['venue_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.rename_table('Show', 'Show_partitioned')
+    op.execute('ALTER TABLE "Show_partitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_partitioned_pkey"')
+    op.drop_constraint('uq_Show_artist_id_venue_id_start_time', 'Show_partitioned', type_='unique')
+    drop_show_indexes('Show')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+    op.create_table('Show',
+    sa.Column('id', sa.Integer(), server_default=sa.text('nextval(\'"Show_id_seq"\'::regclass)'), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('artist_id', 'venue_id', 'start_time', name='uq_Show_artist_id_venue_id_start_time')
+    )
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    create_show_indexes('Show')
+
+    op.execute('''
+        INSERT INTO "Show" (id, artist_id, venue_id, start_time)
+        SELECT id, artist_id, venue_id, start_time FROM "Show_partitioned"
+        UNION ALL
+        SELECT id, artist_id, venue_id, start_time FROM "ShowArchive"
+    ''')
+    op.drop_table('Show_partitioned')
+
+    with op.batch_alter_table('ShowArchive', schema=None) as batch_op:
+        batch_op.drop_index('ix_ShowArchive_venue_id_start_time')
+        batch_op.drop_index('ix_ShowArchive_start_time', postgresql_using='brin')
+        batch_op.drop_index('ix_ShowArchive_artist_id_start_time')
+
+    op.drop_table('ShowArchive')
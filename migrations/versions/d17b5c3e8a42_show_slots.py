@@ -0,0 +1,76 @@
+"""show durations and overlap-checked slots
+
+Revision ID: d17b5c3e8a42
+Revises: a8d4e2f61c90
+Create Date: 2026-10-18 17:36:08.905417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd17b5c3e8a42'
+down_revision = 'a8d4e2f61c90'
+branch_labels = None
+depends_on = None
+
+
+def slot_key(column):
+    return sa.func.int4range(sa.column(column), sa.column(column), sa.literal_column("'[]'"))
+
+
+def upgrade():
+    for table in ('Show', 'ShowArchive'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('duration', sa.Integer(), server_default='120', nullable=False))
+
+    op.create_table('ShowSlot',
+    sa.Column('show_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('during', postgresql.TSRANGE(), nullable=False),
+    postgresql.ExcludeConstraint((slot_key('artist_id'), '&&'), ('during', '&&'), using='gist', name='ex_ShowSlot_artist_id_during'),
+    postgresql.ExcludeConstraint((slot_key('venue_id'), '&&'), ('during', '&&'), using='gist', name='ex_ShowSlot_venue_id_during'),
+    sa.PrimaryKeyConstraint('show_id')
+    )
+
+    op.execute("""
+        CREATE FUNCTION show_slot_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM "ShowSlot" WHERE show_id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO "ShowSlot" (show_id, artist_id, venue_id, during)
+                VALUES (NEW.id, NEW.artist_id, NEW.venue_id,
+                        tsrange(NEW.start_time, NEW.start_time + make_interval(mins => NEW.duration)));
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER "Show_slot" AFTER INSERT OR DELETE OR UPDATE OF artist_id, venue_id, start_time, duration
+        ON "Show" FOR EACH ROW EXECUTE FUNCTION show_slot_sync()
+    """)
+
+    # Shows booked before this revision may already overlap: the earliest
+    # listed of each clash keeps the slot, the others are left without one.
+    op.execute("""
+        INSERT INTO "ShowSlot" (show_id, artist_id, venue_id, during)
+        SELECT id, artist_id, venue_id, tsrange(start_time, start_time + make_interval(mins => duration))
+        FROM "Show" ORDER BY id
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER "Show_slot" ON "Show"')
+    op.execute('DROP FUNCTION show_slot_sync()')
+    op.drop_table('ShowSlot')
+
+    for table in ('ShowArchive', 'Show'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('duration')
@@ -0,0 +1,54 @@
+"""cascading show deletes and soft-deleted venues and artists
+
+Revision ID: e5a0c9b4d6f3
+Revises: d17b5c3e8a42
+Create Date: 2026-10-18 20:14:52.336108
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a0c9b4d6f3'
+down_revision = 'd17b5c3e8a42'
+branch_labels = None
+depends_on = None
+
+
+def show_foreign_key(column):
+    # Named Show_<column>_fkey1 when the table came from the partitioning
+    # migration, Show_<column>_fkey when created from the models.
+    return op.get_bind().execute(sa.text("""
+        SELECT conname FROM pg_constraint
+        JOIN pg_attribute ON attrelid = conrelid AND attnum = conkey[1]
+        WHERE conrelid = '"Show"'::regclass AND contype = 'f' AND attname = :column
+    """), {'column': column}).scalar_one()
+
+
+def replace_show_foreign_keys(ondelete):
+    for column, table in (('artist_id', 'Artist'), ('venue_id', 'Venue')):
+        op.drop_constraint(show_foreign_key(column), 'Show', type_='foreignkey')
+        op.create_foreign_key(f'Show_{column}_fkey', 'Show', table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_show_foreign_keys('CASCADE')
+
+    for table in ('Venue', 'Artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+            batch_op.create_index(f'ix_{table}_deleted_at', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    # Soft-deleted rows would reappear; delete them for good first.
+    op.execute('DELETE FROM "Venue" WHERE deleted_at IS NOT NULL')
+    op.execute('DELETE FROM "Artist" WHERE deleted_at IS NOT NULL')
+
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_deleted_at', postgresql_where=sa.text('deleted_at IS NOT NULL'))
+            batch_op.drop_column('deleted_at')
+
+    replace_show_foreign_keys(None)
@@ -0,0 +1,38 @@
+"""listing versions instead of updated_at indexes
+
+Revision ID: f2a7c5e1d9b0
+Revises: e5a0c9b4d6f3
+Create Date: 2026-10-19 10:42:17.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c5e1d9b0'
+down_revision = 'e5a0c9b4d6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ListingVersion',
+    sa.Column('name', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("""INSERT INTO "ListingVersion" (name) VALUES ('artists'), ('shows'), ('venues')""")
+
+    # They only served the listing validators.
+    for table in ('Venue', 'Artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at')
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_updated_at', ['updated_at'], unique=False)
+
+    op.drop_table('ListingVersion')
@@ -1,7 +1,43 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql  # registers the to_tsvector/to_tsquery function types
+from sqlalchemy.orm import raiseload, with_loader_criteria
+from datetime import date, datetime
+from enums import GENRE_CODES, GENRES_BY_CODE
 
-db = SQLAlchemy()
+class RoutingSession(Session):
+    """ Sends plain SELECTs to the replica bind named in info['replica'],
+    which replicas.py sets for the requests allowed to read from one.
+    Flushes, DML, SELECT ... FOR UPDATE and text statements always go to
+    the primary.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if (replica is not None and bind is None and getattr(clause, 'is_select', False)
+                and getattr(clause, '_for_update_arg', None) is None):
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+class GenreList(db.TypeDecorator):
+    """ A list of Genre names in Python, stored as a smallint[] of their
+    codes: 2 bytes a genre instead of the name, and GIN indexable.
+    """
+    impl = postgresql.ARRAY(db.SmallInteger)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return [GENRE_CODES[name] for name in value]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return [GENRES_BY_CODE[code] for code in value]
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
@@ -12,13 +48,21 @@ class Venue(db.Model):
     state = db.Column(db.String(120), nullable=False)
     address = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(GenreList, nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='venue', lazy='joined', cascade="all, delete")
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), server_default=db.func.now())
+    # Set by a soft delete; the row is hidden until deletes.purge() removes it.
+    deleted_at = db.Column(db.DateTime)
+    # Shows go with their venue through ON DELETE CASCADE. Views list them
+    # through the projections in queries.py; loading them from here raises.
+    shows = db.relationship('Show', backref='venue', lazy='raise', cascade="all, delete", passive_deletes=True)
 
     def __repr__(self):
         return f'<Venue ID: {self.id}, Name: {self.name}>'
@@ -31,24 +75,262 @@ class Artist(db.Model):
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(GenreList, nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='artist', lazy='joined', cascade="all, delete")
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), server_default=db.func.now())
+    # Set by a soft delete; the row is hidden until deletes.purge() removes it.
+    deleted_at = db.Column(db.DateTime)
+    # Shows go with their artist through ON DELETE CASCADE. Views list them
+    # through the projections in queries.py; loading them from here raises.
+    shows = db.relationship('Show', backref='artist', lazy='raise', cascade="all, delete", passive_deletes=True)
 
     def __repr__(self):
         return f'<Artist ID: {self.id}, Name: {self.name}>'
 
+# Length of a show in minutes when none is given.
+SHOW_DURATION = 120
+
 class Show(db.Model):
     __tablename__ = 'Show'
+    # Range partitioned by month of start_time (see storage.py), so the key
+    # and unique constraints have to include it.
+    __table_args__ = (
+        db.UniqueConstraint('artist_id', 'venue_id', 'start_time', name='uq_Show_artist_id_venue_id_start_time'),
+        {'postgresql_partition_by': 'RANGE (start_time)'},
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False, default=datetime.today())
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    start_time = db.Column(db.DateTime, primary_key=True, nullable=False, default=datetime.today())
+    duration = db.Column(db.Integer, nullable=False, default=SHOW_DURATION, server_default=str(SHOW_DURATION))
+    updated_at = db.Column(db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), server_default=db.func.now())
 
     def __repr__(self):
         return f'<Show ID: {self.id}, artist_id: {self.artist_id}, venue_id: {self.venue_id}, start_time: {self.start_time}>'
+
+# Rows outside every monthly partition land here until one is created.
+event.listen(Show.__table__, 'after_create', db.DDL('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT'))
+
+# Months after the current one that get their partition ahead of time.
+MONTHS_AHEAD = 12
+
+def add_months(day, months):
+    """ First day of the month `months` after the month of `day`. """
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+def partition_name(start):
+    return f'Show_{start:%Y_%m}'
+
+def create_initial_partitions(target, connection, **kw):
+    """ Give a Show table made by create_all() the partitions `flask shows
+    partitions` would (see storage.py): the current month and MONTHS_AHEAD
+    after it. The table is empty, so nothing has to move out of the default
+    partition.
+    """
+    month = add_months(date.today(), 0)
+    for _ in range(MONTHS_AHEAD + 1):
+        connection.execute(db.text(
+            f'CREATE TABLE "{partition_name(month)}" PARTITION OF "Show" '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+        month = add_months(month, 1)
+
+event.listen(Show.__table__, 'after_create', create_initial_partitions)
+
+class ShowArchive(db.Model):
+    __tablename__ = 'ShowArchive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    duration = db.Column(db.Integer, nullable=False, default=SHOW_DURATION, server_default=str(SHOW_DURATION))
+
+    def __repr__(self):
+        return f'<ShowArchive ID: {self.id}, artist_id: {self.artist_id}, venue_id: {self.venue_id}, start_time: {self.start_time}>'
+
+#----------------------------------------------------------------------------#
+# Bookings.
+#----------------------------------------------------------------------------#
+
+# The time every live show occupies its artist and venue, [start, end), kept
+# in step with Show by a trigger (see bookings.py). A partitioned table can't
+# hold an exclusion constraint, so the overlap checks live here: GiST indexes
+# on (id range, time range) that reject a second booking of the same artist
+# or venue for an overlapping time, atomically and without btree_gist.
+
+def slot_key(column):
+    """ An id as a one-element range, so GiST can compare it with &&. """
+    return db.func.int4range(column, column, db.literal_column("'[]'"))
+
+class ShowSlot(db.Model):
+    __tablename__ = 'ShowSlot'
+    __table_args__ = (
+        postgresql.ExcludeConstraint(
+            (slot_key(db.column('artist_id')), '&&'), ('during', '&&'),
+            using='gist', name='ex_ShowSlot_artist_id_during'
+        ),
+        postgresql.ExcludeConstraint(
+            (slot_key(db.column('venue_id')), '&&'), ('during', '&&'),
+            using='gist', name='ex_ShowSlot_venue_id_during'
+        ),
+    )
+
+    show_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    artist_id = db.Column(db.Integer, nullable=False)
+    venue_id = db.Column(db.Integer, nullable=False)
+    during = db.Column(postgresql.TSRANGE, nullable=False)
+
+# Created once every table exists, since the trigger is on Show.
+event.listen(db.metadata, 'after_create', db.DDL("""
+CREATE OR REPLACE FUNCTION show_slot_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM "ShowSlot" WHERE show_id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO "ShowSlot" (show_id, artist_id, venue_id, during)
+        VALUES (NEW.id, NEW.artist_id, NEW.venue_id,
+                tsrange(NEW.start_time, NEW.start_time + make_interval(mins => NEW.duration)));
+    END IF;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER "Show_slot" AFTER INSERT OR DELETE OR UPDATE OF artist_id, venue_id, start_time, duration
+ON "Show" FOR EACH ROW EXECUTE FUNCTION show_slot_sync();
+"""))
+
+#----------------------------------------------------------------------------#
+# Match index.
+#----------------------------------------------------------------------------#
+
+# Inverted index for matchmaking (see matches.py): one row per (state, city,
+# genre) of every venue seeking talent and every artist seeking a venue.
+# The primary key is the lookup path; city is stored lowercased and trimmed.
+
+class VenueMatch(db.Model):
+    __tablename__ = 'VenueMatch'
+
+    state = db.Column(db.String(120), primary_key=True)
+    city = db.Column(db.String(120), primary_key=True)
+    genre = db.Column(db.SmallInteger, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True)
+
+class ArtistMatch(db.Model):
+    __tablename__ = 'ArtistMatch'
+
+    state = db.Column(db.String(120), primary_key=True)
+    city = db.Column(db.String(120), primary_key=True)
+    genre = db.Column(db.SmallInteger, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True)
+
+
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+# A version per listing page ('venues', 'artists', 'shows'), the validator
+# of its conditional GETs: every write that changes a listing bumps it in
+# its own transaction (see conditional.bump_listings), so the new version
+# becomes visible with the change, whatever order transactions commit in.
+
+LISTINGS = ('artists', 'shows', 'venues')
+
+class ListingVersion(db.Model):
+    __tablename__ = 'ListingVersion'
+
+    name = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, server_default='0')
+
+event.listen(ListingVersion.__table__, 'after_create', db.DDL(
+    'INSERT INTO "ListingVersion" (name) VALUES ' + ', '.join(f"('{name}')" for name in LISTINGS)
+))
+
+#----------------------------------------------------------------------------#
+# Indexes.
+#----------------------------------------------------------------------------#
+
+# Shows of one venue/artist in date order (detail pages, counters).
+db.Index('ix_Show_venue_id_start_time', Show.venue_id, Show.start_time)
+db.Index('ix_Show_artist_id_start_time', Show.artist_id, Show.start_time)
+# Keyset order of the /shows listing.
+db.Index('ix_Show_start_time_id', Show.start_time, Show.id)
+# Past shows of one venue/artist; archived rows arrive in date order, so a
+# BRIN index covers the date range scans at a fraction of a btree's size.
+db.Index('ix_ShowArchive_venue_id_start_time', ShowArchive.venue_id, ShowArchive.start_time)
+db.Index('ix_ShowArchive_artist_id_start_time', ShowArchive.artist_id, ShowArchive.start_time)
+db.Index('ix_ShowArchive_start_time', ShowArchive.start_time, postgresql_using='brin')
+# Reindexing an entity, and cascading its deletion.
+db.Index('ix_VenueMatch_venue_id', VenueMatch.venue_id)
+db.Index('ix_ArtistMatch_artist_id', ArtistMatch.artist_id)
+# State facet of the browse endpoints, combined with the genre GIN indexes.
+db.Index('ix_Venue_state', Venue.state)
+db.Index('ix_Artist_state', Artist.state)
+# Keyset order of the /venues city/state listing.
+db.Index('ix_Venue_city_state_id', Venue.city, Venue.state, Venue.id)
+# Entities the counter sweep has to roll forward; most have no next show.
+db.Index('ix_Venue_next_show_time', Venue.next_show_time, postgresql_where=Venue.next_show_time.isnot(None))
+db.Index('ix_Artist_next_show_time', Artist.next_show_time, postgresql_where=Artist.next_show_time.isnot(None))
+# Soft-deleted entities waiting for the purge.
+db.Index('ix_Venue_deleted_at', Venue.deleted_at, postgresql_where=Venue.deleted_at.isnot(None))
+db.Index('ix_Artist_deleted_at', Artist.deleted_at, postgresql_where=Artist.deleted_at.isnot(None))
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+def search_document(model):
+    """ Full-text document over name, city and state of a model or table
+    columns. The expression has to match the one in the GIN index below for
+    the planner to use it.
+    """
+    return db.func.to_tsvector(
+        db.text("'simple'::regconfig"),
+        model.name + db.literal_column("' '") + model.city + db.literal_column("' '") + model.state
+    )
+
+db.Index('ix_Venue_search', search_document(Venue.__table__.c), postgresql_using='gin')
+db.Index('ix_Venue_genres', Venue.genres, postgresql_using='gin')
+db.Index('ix_Artist_search', search_document(Artist.__table__.c), postgresql_using='gin')
+db.Index('ix_Artist_genres', Artist.genres, postgresql_using='gin')
+
+#----------------------------------------------------------------------------#
+# Loading.
+#----------------------------------------------------------------------------#
+
+# Soft-deleted venues and artists are left out of every ORM SELECT, joins and
+# subqueries included, unless it runs with include_deleted=True.
+HIDE_DELETED = (
+    with_loader_criteria(Venue, Venue.deleted_at.is_(None), include_aliases=True),
+    with_loader_criteria(Artist, Artist.deleted_at.is_(None), include_aliases=True),
+)
+
+def _hide_deleted(state):
+    if state.is_select and not state.execution_options.get('include_deleted', False):
+        state.statement = state.statement.options(*HIDE_DELETED)
+
+def _raise_on_lazy_load(state):
+    # Relationship and column loads are the plan being carried out, only
+    # top-level statements get the wildcard. The session is shared by every
+    # app, so the setting is read from the one in use.
+    if (state.is_select and not state.is_relationship_load and not state.is_column_load
+            and current_app.config.get('RAISE_ON_LAZY_LOAD')):
+        state.statement = state.statement.options(raiseload('*'))
+
+def init_loading(app):
+    """ Hide soft-deleted rows. With RAISE_ON_LAZY_LOAD set, any
+    relationship not loaded through an explicit loader option also raises
+    instead of silently emitting a query.
+    """
+    for listener in (_hide_deleted, _raise_on_lazy_load):
+        if not event.contains(db.session, 'do_orm_execute', listener):
+            event.listen(db.session, 'do_orm_execute', listener)
@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request, abort
+from models import db
+
+#----------------------------------------------------------------------------#
+# Cursors.
+#----------------------------------------------------------------------------#
+
+def encode_cursor(values):
+    """ Serialize the sort key of the last row of a page into an opaque token. """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def cursor_value(column, value):
+    """ A decoded cursor value as the Python type of its column; raises
+    ValueError when it can't be one, before it reaches the database.
+    """
+    if isinstance(column.type, db.DateTime):
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+    elif isinstance(column.type, db.Integer):
+        bits = 63 if isinstance(column.type, db.BigInteger) else 31
+        if isinstance(value, int) and not isinstance(value, bool) and -2 ** bits <= value < 2 ** bits:
+            return value
+    elif isinstance(column.type, db.String):
+        if isinstance(value, str):
+            return value
+    else:
+        return value
+    raise ValueError('Invalid cursor.')
+
+def decode_cursor(token, columns):
+    """ Inverse of encode_cursor; raises ValueError on a malformed token or
+    one whose values don't fit their columns.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor.')
+
+    return [cursor_value(column, value) for column, value in zip(columns, values)]
+
+#----------------------------------------------------------------------------#
+# Pages.
+#----------------------------------------------------------------------------#
+
+class Page:
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+def page_size(limit=None):
+    default = current_app.config.get('PAGE_SIZE', 50)
+    maximum = current_app.config.get('MAX_PAGE_SIZE', 500)
+    if limit is None:
+        limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, maximum))
+
+def paginate(query, columns, after=None, limit=None, descending=False):
+    """ Seek pagination over `columns`, which must uniquely order the rows.
+
+    Each row of `query` has to expose the sort columns as attributes of the
+    same name, so entity queries and column projections both work. Reads
+    `?after=` and `?limit=` from the request when they are not passed in;
+    an empty `after` always starts at the first page.
+    With `descending` the rows run newest first, in reverse column order.
+    """
+    limit = page_size(limit)
+    if after is None:
+        after = request.args.get('after')
+
+    if after:
+        try:
+            values = decode_cursor(after, columns)
+        except ValueError:
+            abort(400)
+        key, values = db.tuple_(*columns), db.tuple_(*values)
+        query = query.filter(key < values if descending else key > values)
+
+    order = [column.desc() for column in columns] if descending else columns
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+    return Page(rows, next_cursor, limit)
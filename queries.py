@@ -0,0 +1,155 @@
+from itertools import groupby
+from models import db, Venue, Artist, Show, ShowArchive
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+VENUE_AREA_ORDER = (Venue.city, Venue.state, Venue.id)
+
+def venue_rows():
+    """ One row per venue with its upcoming show count. """
+    return db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    )
+
+def venue_areas(rows):
+    """ Group venue rows ordered by (city, state) into areas.
+
+    Each area is emitted as soon as it is complete, so the rows can be
+    streamed into the template without materializing the whole listing.
+    """
+    for (city, state), group in groupby(rows, key=lambda row: (row.city, row.state)):
+        yield {
+            "city": city,
+            "state": state,
+            "venues": [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "num_upcoming_shows": row.num_upcoming_shows,
+                }
+                for row in group
+            ]
+        }
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+SHOW_ORDER = (Show.start_time, Show.id)
+
+def show_rows():
+    """ Shows joined to their venue and artist, projecting only listed columns. """
+    return db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(
+        Venue, Venue.id == Show.venue_id
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    )
+
+def shows_data(rows):
+    return [
+        {
+            'venue_id': row.venue_id,
+            'venue_name': row.venue_name,
+            'artist_id': row.artist_id,
+            'artist_name': row.artist_name,
+            'artist_image_link': row.artist_image_link,
+            'start_time': row.start_time
+        }
+        for row in rows
+    ]
+
+#----------------------------------------------------------------------------#
+# Shows of one venue or artist.
+#----------------------------------------------------------------------------#
+
+# For each detail page: the Show column naming the owner, and the name and
+# model of the entity listed opposite it.
+SHOW_SIDES = {
+    'venue': ('venue_id', 'artist', Artist),
+    'artist': ('artist_id', 'venue', Venue),
+}
+
+def _opposite(side, key):
+    """ Columns describing the entity opposite `side`, joined through `key`. """
+    _, other_name, other = SHOW_SIDES[side]
+    return (
+        key.label(f'{other_name}_id'),
+        other.name.label(f'{other_name}_name'),
+        other.image_link.label(f'{other_name}_image_link'),
+    )
+
+def upcoming_shows(side, owner_id):
+    """ Upcoming shows of one venue or artist and their keyset order.
+
+    The start_time bound lets Postgres prune the partitions of past months.
+    """
+    owner_key, other_name, other = SHOW_SIDES[side]
+    other_key = getattr(Show, f'{other_name}_id')
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        *_opposite(side, other_key)
+    ).join(
+        other, other.id == other_key
+    ).filter(
+        getattr(Show, owner_key) == owner_id,
+        Show.start_time > db.func.now()
+    )
+    return query, (Show.start_time, Show.id)
+
+def past_shows(side, owner_id):
+    """ Past shows of one venue or artist and their keyset order.
+
+    Covers the past partitions of Show and the archive, to be paginated
+    newest first.
+    """
+    owner_key, other_name, other = SHOW_SIDES[side]
+
+    def columns(model):
+        return model.id, model.start_time, getattr(model, f'{other_name}_id')
+
+    history = db.union_all(
+        db.select(*columns(Show)).where(
+            getattr(Show, owner_key) == owner_id,
+            Show.start_time <= db.func.now()
+        ),
+        db.select(*columns(ShowArchive)).where(
+            getattr(ShowArchive, owner_key) == owner_id
+        ),
+    ).subquery('history')
+
+    other_key = history.c[f'{other_name}_id']
+    query = db.session.query(
+        history.c.id,
+        history.c.start_time,
+        *_opposite(side, other_key)
+    ).join(
+        other, other.id == other_key
+    )
+    return query, (history.c.start_time, history.c.id)
+
+def detail_shows_data(rows, other_name):
+    """ Show rows of a detail page, describing the venue or artist opposite. """
+    return [
+        {
+            f'{other_name}_id': getattr(row, f'{other_name}_id'),
+            f'{other_name}_name': getattr(row, f'{other_name}_name'),
+            f'{other_name}_image_link': getattr(row, f'{other_name}_image_link'),
+            'start_time': row.start_time
+        }
+        for row in rows
+    ]
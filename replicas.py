@@ -0,0 +1,81 @@
+import random
+import time
+from flask import g, request, session
+from models import db
+
+#----------------------------------------------------------------------------#
+# Routing.
+#----------------------------------------------------------------------------#
+
+# Requests that never write: safe methods and the views marked read_only.
+# Everything else is handled on the primary and keeps its client there for
+# REPLICA_STICKY_SECONDS, so the page it redirects to shows the change even
+# while the replicas lag behind.
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def read_only(view):
+    """ Mark a view that only reads though it answers a POST (search forms,
+    validation), so it may run on a replica.
+    """
+    view.read_only = True
+    return view
+
+def replica_keys(config):
+    """ The SQLALCHEMY_BINDS keys of the read replicas. """
+    return sorted(key for key in config.get('SQLALCHEMY_BINDS') or {} if key.startswith('replica'))
+
+def choose_bind(reads_only, primary_until, now, replicas):
+    """ The replica a request reads from, or None for the primary: requests
+    that only read, from clients outside their window after a write, spread
+    over the replicas; everything else stays on the primary.
+    """
+    if not replicas or not reads_only:
+        return None
+    if primary_until is not None and now < primary_until:
+        return None
+    return random.choice(replicas)
+
+def on_primary():
+    """ Whether the current request is pinned to the primary after a write
+    of its client; the page cache doesn't serve those from its entries.
+    """
+    return g.get('sticky_primary', False)
+
+def on_replica():
+    """ Whether the current request reads from a replica. """
+    return db.session.info.get('replica') is not None
+
+#----------------------------------------------------------------------------#
+# Requests.
+#----------------------------------------------------------------------------#
+
+def init_replicas(app):
+    """ Route reads to the replicas in SQLALCHEMY_BINDS, if any. """
+    replicas = replica_keys(app.config)
+    if not replicas:
+        return
+    window = app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+    def reads_only():
+        view = app.view_functions.get(request.endpoint)
+        return request.method in SAFE_METHODS or getattr(view, 'read_only', False)
+
+    @app.before_request
+    def route_reads():
+        primary_until = session.get('primary_until')
+        g.sticky_primary = primary_until is not None and time.time() < primary_until
+        db.session.info['replica'] = choose_bind(reads_only(), primary_until, time.time(), replicas)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if not reads_only():
+            session['primary_until'] = time.time() + window
+        elif 'primary_until' in session and not g.get('sticky_primary'):
+            session.pop('primary_until')
+        return response
+
+    # The session outlives the request when an app context was already
+    # pushed (CLI commands, the benchmarks).
+    @app.teardown_request
+    def reset_route(error):
+        db.session.info.pop('replica', None)
@@ -0,0 +1,58 @@
+import re
+from flask import current_app
+from enums import GENRE_CODES
+from models import db, search_document
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+def prefix_query(search_term):
+    """ Turn free text into a tsquery matching every word as a prefix, so
+    partially typed terms still hit the index: 'blue jaz' -> 'blue:* & jaz:*'.
+    """
+    words = re.findall(r'\w+', search_term)
+    if not words:
+        return None
+    return db.func.to_tsquery('simple', ' & '.join(f'{word}:*' for word in words))
+
+def search(model, search_term, genre=None, limit=None):
+    """ Ranked search over Venue or Artist with upcoming show counts.
+    Matching, ranking and the total all come from one query.
+    """
+    if limit is None:
+        limit = current_app.config.get('SEARCH_LIMIT', 20)
+
+    query = db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+        db.func.count().over().label('total')
+    )
+
+    tsquery = prefix_query(search_term)
+    if tsquery is not None:
+        document = search_document(model)
+        query = query.filter(document.op('@@')(tsquery)).order_by(
+            db.func.ts_rank(document, tsquery).desc(), model.name
+        )
+    else:
+        query = query.order_by(model.name)
+
+    if genre:
+        # Unknown genres have no code and can match nothing.
+        query = query.filter(model.genres.contains([genre]) if genre in GENRE_CODES else db.false())
+
+    rows = query.limit(limit).all()
+
+    return {
+        "count": rows[0].total if rows else 0,
+        "data": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "num_upcoming_shows": row.num_upcoming_shows,
+            }
+            for row in rows
+        ]
+    }
@@ -0,0 +1,89 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Show, SHOW_DURATION
+from queries import SHOW_ORDER, show_rows, shows_data
+from pagination import paginate
+from counters import record_show
+from bookings import booking_conflict
+from cache import cache
+from conditional import conditional, shows_state, bump_listings
+
+#----------------------------------------------------------------------------#
+# Blueprint.
+#----------------------------------------------------------------------------#
+
+# Forms are imported inside the views that use them; WTForms is only
+# loaded once somebody opens a form.
+bp = Blueprint('shows', __name__, url_prefix='/shows')
+
+#  Shows List
+#  ----------------------------------------------------------------
+@bp.route('')
+@conditional(shows_state)
+@cache.page('shows')
+def shows():
+    page = paginate(show_rows(), SHOW_ORDER)
+    return render_template('pages/shows.html', shows=shows_data(page.items), page=page)
+
+#  Create Show
+#  ----------------------------------------------------------------
+@bp.route('/create')
+def create_shows():
+    from forms import ShowForm
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+@bp.route('/create', methods=['POST'])
+def create_show_submission():
+    from forms import ShowForm
+    form = ShowForm(request.form)
+    error = False
+    conflict = None
+
+    if form.validate() == False:
+        error = True
+    else:
+        try:
+            show = Show(
+                artist_id=form.artist_id.data,
+                venue_id=form.venue_id.data,
+                start_time=form.start_time.data,
+                duration=form.duration.data or SHOW_DURATION,
+            )
+            # The unique constraint makes the duplicate check part of the
+            # insert, and the ShowSlot exclusion constraints the overlap
+            # check; missing venues/artists fail on their foreign keys.
+            created = db.session.execute(
+                insert(Show).values(
+                    artist_id=show.artist_id,
+                    venue_id=show.venue_id,
+                    start_time=show.start_time,
+                    duration=show.duration,
+                ).on_conflict_do_nothing(
+                    constraint='uq_Show_artist_id_venue_id_start_time'
+                ).returning(Show.id)
+            ).first()
+            if created is None:
+                error = True
+                db.session.rollback()
+            else:
+                record_show(show)
+                bump_listings('shows', 'venues', 'artists')
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error = True
+            conflict = booking_conflict(e)
+        finally:
+            db.session.close()
+
+    if conflict:
+        flash(f'Show could not be listed: the {conflict} is already booked at that time.')
+        return render_template('forms/new_show.html', form=form)
+    if error:
+        flash('An error occurred. Show could not be listed.')
+        return render_template('forms/new_show.html', form=form)
+
+    cache.invalidate(f'venue:{form.venue_id.data}', f'artist:{form.artist_id.data}', 'shows', 'venues', 'artists')
+    flash('Show was successfully listed!')
+    return redirect(url_for('pages.index'))
@@ -2,3 +2,62 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Show tile as rendered by the venue/artist detail templates; `side` is the
+// entity the tile links to ("artist" on venue pages, "venue" on artist pages).
+function showTile(show, side) {
+  var label = side.charAt(0).toUpperCase() + side.slice(1);
+
+  var image = document.createElement('img');
+  image.src = show[side + '_image_link'] || '';
+  image.alt = 'Show ' + label + ' Image';
+
+  var link = document.createElement('a');
+  link.href = '/' + side + 's/' + show[side + '_id'];
+  link.textContent = show[side + '_name'];
+  var name = document.createElement('h5');
+  name.appendChild(link);
+
+  var time = document.createElement('h6');
+  time.textContent = show.start_time;
+
+  var tile = document.createElement('div');
+  tile.className = 'tile tile-show';
+  tile.appendChild(image);
+  tile.appendChild(name);
+  tile.appendChild(time);
+
+  var column = document.createElement('div');
+  column.className = 'col-sm-4';
+  column.appendChild(tile);
+  return column;
+}
+
+// "More shows" buttons page through the show JSON endpoints, appending each
+// page to the section and following the returned cursor until it runs out.
+Array.prototype.forEach.call(document.querySelectorAll('.load-shows'), function (button) {
+  button.onclick = function () {
+    button.disabled = true;
+    var url = button.dataset['url'] + '&after=' + encodeURIComponent(button.dataset['after']);
+    fetch(url)
+    .then(function (response) {
+      return response.json();
+    })
+    .then(function (page) {
+      var target = document.getElementById(button.dataset['target']);
+      page.data.forEach(function (show) {
+        target.appendChild(showTile(show, button.dataset['side']));
+      });
+      if (page.next) {
+        button.dataset['after'] = page.next;
+        button.disabled = false;
+      } else {
+        button.parentNode.removeChild(button);
+      }
+    })
+    .catch(function (e) {
+      console.log(e);
+      button.disabled = false;
+    });
+  };
+});
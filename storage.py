@@ -0,0 +1,139 @@
+import re
+from datetime import date, datetime
+import click
+from flask.cli import AppGroup
+from models import db, Show, ShowArchive, ShowSlot, MONTHS_AHEAD, add_months, partition_name
+from conditional import bump_listings
+
+#----------------------------------------------------------------------------#
+# Partitions.
+#----------------------------------------------------------------------------#
+
+# Show is range partitioned by month of start_time into "Show_YYYY_MM"
+# tables, with "Show_default" catching anything outside them. Queries that
+# bound start_time (upcoming shows, past shows of one month) only touch the
+# matching partitions. A Show table made by create_all() comes with them
+# from the current month to MONTHS_AHEAD after it (see models.py).
+
+PARTITION_NAME = re.compile(r'^Show_(\d{4})_(\d{2})$')
+
+def partitions():
+    """ First day of the month of every monthly Show partition, in order. """
+    names = db.session.execute(db.text(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        "WHERE parent.relname = 'Show'"
+    )).scalars()
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def create_partition(start):
+    """ Create and attach the partition for the month starting at `start`.
+
+    Rows the default partition already holds for that month are moved into
+    the new table first, otherwise attaching it would fail. Deleting them
+    from the default partition drops their slots, so those are put back;
+    shows that overlapped before slots existed never had one and are left
+    without.
+    """
+    name = partition_name(start)
+    bounds = {'start': start, 'end': add_months(start, 1)}
+    db.session.execute(db.text(f'CREATE TABLE "{name}" (LIKE "Show" INCLUDING DEFAULTS)'))
+    db.session.execute(db.text(
+        'WITH moved AS ('
+        '  DELETE FROM "Show_default" WHERE start_time >= :start AND start_time < :end RETURNING *'
+        f') INSERT INTO "{name}" SELECT * FROM moved'
+    ), bounds)
+    db.session.execute(db.text(
+        f'ALTER TABLE "Show" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    db.session.execute(db.text(
+        f'INSERT INTO "{ShowSlot.__tablename__}" (show_id, artist_id, venue_id, during) '
+        'SELECT id, artist_id, venue_id, tsrange(start_time, start_time + make_interval(mins => duration)) '
+        f'FROM "{name}" '
+        'ON CONFLICT DO NOTHING'
+    ))
+
+def ensure_partitions(first, last):
+    """ Make sure every month from `first` to `last` has its partition. """
+    existing = set(partitions())
+    month, last = add_months(first, 0), add_months(last, 0)
+    while month <= last:
+        if month not in existing:
+            create_partition(month)
+        month = add_months(month, 1)
+
+#----------------------------------------------------------------------------#
+# Archive.
+#----------------------------------------------------------------------------#
+
+ARCHIVE_COLUMNS = 'id, artist_id, venue_id, start_time, duration'
+
+def archive(before):
+    """ Move every show starting before the month of `before` to ShowArchive.
+
+    Whole monthly partitions are detached, copied and dropped, which leaves
+    no dead rows behind in Show; only stragglers in the default partition
+    are moved row by row. Detaching skips the ShowSlot trigger, so the
+    slots of the moved shows are deleted too. Returns the number of shows
+    moved.
+    """
+    cutoff = add_months(before, 0)
+    moved = 0
+    for month in partitions():
+        if add_months(month, 1) > cutoff:
+            break
+        name = partition_name(month)
+        db.session.execute(db.text(f'ALTER TABLE "Show" DETACH PARTITION "{name}"'))
+        moved += db.session.execute(db.text(
+            f'INSERT INTO "{ShowArchive.__tablename__}" ({ARCHIVE_COLUMNS}) '
+            f'SELECT {ARCHIVE_COLUMNS} FROM "{name}"'
+        )).rowcount
+        db.session.execute(db.text(f'DROP TABLE "{name}"'))
+
+    moved += db.session.execute(db.text(
+        'WITH moved AS ('
+        f'  DELETE FROM "Show_default" WHERE start_time < :cutoff RETURNING {ARCHIVE_COLUMNS}'
+        f') INSERT INTO "{ShowArchive.__tablename__}" ({ARCHIVE_COLUMNS}) '
+        f'SELECT {ARCHIVE_COLUMNS} FROM moved'
+    ), {'cutoff': cutoff}).rowcount
+    db.session.execute(
+        db.delete(ShowSlot).where(db.func.lower(ShowSlot.during) < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    return moved
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+storage_cli = AppGroup('shows', help='Maintain the Show partitions and archive.')
+
+@storage_cli.command('partitions')
+@click.option('--months-ahead', type=int, default=MONTHS_AHEAD, show_default=True,
+              help='Months after the current one to create partitions for.')
+@click.option('--months-back', type=int, default=0, show_default=True,
+              help='Months before the current one to create partitions for.')
+def partitions_command(months_ahead, months_back):
+    """ Create the monthly Show partitions around the current month. """
+    db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+    today = date.today()
+    ensure_partitions(add_months(today, -months_back), add_months(today, months_ahead))
+    db.session.commit()
+
+@storage_cli.command('archive')
+@click.option('--keep-months', type=int, default=12, show_default=True,
+              help='Past months to keep in the Show partitions.')
+def archive_command(keep_months):
+    """ Move shows older than --keep-months into the archive. """
+    db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+    moved = archive(add_months(datetime.now(), -keep_months))
+    bump_listings('shows')
+    db.session.commit()
+    click.echo(f'Archived {moved} shows.')
@@ -0,0 +1,92 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Database.
+#----------------------------------------------------------------------------#
+
+# The tests create and drop every table of this database; never point it at
+# one whose data matters.
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+def make_config(**overrides):
+    import config
+    settings = {key: getattr(config, key) for key in dir(config) if key.isupper()}
+    settings.update(
+        SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL,
+        SQLALCHEMY_BINDS={},
+        TESTING=True,
+        DEBUG=True,
+        WTF_CSRF_ENABLED=False,
+        CACHE_TYPE='null',
+        RAISE_ON_LAZY_LOAD=True,
+    )
+    settings.update(overrides)
+    return type('TestConfig', (), settings)
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip('Set TEST_DATABASE_URL to a scratch Postgres database.')
+    from app import create_app
+    from models import db
+    app = create_app(make_config())
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def add_shows(app):
+    """ Add `count` upcoming shows, each with a venue and an artist of its
+    own, counters included.
+    """
+    from models import db, Venue, Artist, Show
+    from counters import record_show
+
+    def add(count):
+        with app.app_context():
+            for number in range(count):
+                venue = Venue(name=f'Venue {number}', city='New York', state='NY', address='-', genres=['Jazz'])
+                artist = Artist(name=f'Artist {number}', city='New York', state='NY', genres=['Jazz'])
+                db.session.add_all([venue, artist])
+                db.session.flush()
+                show = Show(venue_id=venue.id, artist_id=artist.id, start_time=datetime.now() + timedelta(days=number + 1))
+                db.session.add(show)
+                record_show(show)
+            db.session.commit()
+    return add
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+@pytest.fixture
+def count_queries():
+    """ Counts statements sent to the database while the returned counter
+    is in use: `with count_queries() as counter: ...; counter.count`.
+    """
+    class Counter:
+        count = 0
+
+        def __call__(self, *args):
+            self.count += 1
+
+        def __enter__(self):
+            event.listen(Engine, 'before_cursor_execute', self)
+            return self
+
+        def __exit__(self, *args):
+            event.remove(Engine, 'before_cursor_execute', self)
+
+    return Counter
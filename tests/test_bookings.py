@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import pytest
+
+#----------------------------------------------------------------------------#
+# Calendar.
+#----------------------------------------------------------------------------#
+
+EIGHT_PM = datetime(2031, 6, 1, 20, 0)
+
+def show(artist_id, venue_id, start_time, duration=None):
+    return {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time, 'duration': duration}
+
+@pytest.fixture
+def calendar():
+    """ A calendar holding artist 1 at venue 1 from 8pm to 10pm, as entry 0. """
+    from bookings import Calendar
+    calendar = Calendar()
+    calendar.add(show(1, 1, EIGHT_PM), 0)
+    return calendar
+
+@pytest.mark.parametrize('hours, found', [
+    # Starts during the accepted show: its previous neighbour.
+    (1, [('artist', 0)]),
+    # Ends during it: its next neighbour.
+    (-1, [('artist', 0)]),
+    (0, [('artist', 0)]),
+    # Back to back, on either side.
+    (2, []),
+    (-2, []),
+])
+def test_conflicts(calendar, hours, found):
+    assert calendar.conflicts(show(1, 2, EIGHT_PM + timedelta(hours=hours))) == found
+
+def test_conflicts_both_sides(calendar):
+    assert calendar.conflicts(show(1, 1, EIGHT_PM)) == [('artist', 0), ('venue', 0)]
+    assert calendar.conflicts(show(2, 2, EIGHT_PM)) == []
+
+def test_conflicts_duration(calendar):
+    calendar.add(show(2, 2, EIGHT_PM, duration=30), 1)
+    assert calendar.conflicts(show(2, 3, EIGHT_PM + timedelta(minutes=30))) == []
+    assert calendar.conflicts(show(2, 3, EIGHT_PM - timedelta(minutes=30), duration=31)) == [('artist', 1)]
+
+def test_conflicts_between_neighbours(calendar):
+    # 8pm-10pm and midnight-2am: 10pm-midnight is free, 11pm is not.
+    calendar.add(show(1, 1, EIGHT_PM + timedelta(hours=4)), 1)
+    assert calendar.conflicts(show(1, 2, EIGHT_PM + timedelta(hours=2))) == []
+    assert calendar.conflicts(show(1, 2, EIGHT_PM + timedelta(hours=3))) == [('artist', 1)]
+    assert calendar.conflicts(show(1, 2, EIGHT_PM + timedelta(hours=1), duration=240)) == [
+        ('artist', 0), ('artist', 1)
+    ]
+
+#----------------------------------------------------------------------------#
+# Batches.
+#----------------------------------------------------------------------------#
+
+@pytest.fixture
+def booking_ids(app):
+    """ (artist id, venue id) of a pair with no shows. """
+    from models import db, Venue, Artist
+    with app.app_context():
+        venue = Venue(name='Booked Venue', city='New York', state='NY', address='-', genres=['Jazz'])
+        artist = Artist(name='Booked Artist', city='New York', state='NY', genres=['Jazz'])
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        return artist.id, venue.id
+
+def test_check_shows_line_numbers(app, booking_ids):
+    from bulk import check_shows
+
+    artist_id, venue_id = booking_ids
+    rows = [
+        (10, show(artist_id, venue_id, EIGHT_PM)),
+        (12, show(artist_id, venue_id, EIGHT_PM)),
+        (15, show(artist_id, venue_id, EIGHT_PM + timedelta(hours=2))),
+        (17, show(artist_id, venue_id, EIGHT_PM + timedelta(hours=3))),
+    ]
+    with app.app_context():
+        booked, rejected = check_shows(rows)
+
+    assert [number for number, _ in booked] == [10, 15]
+    # Conflicts with an earlier row name its line, not its position.
+    assert rejected == [
+        (12, {'start_time': ['Show already exists.']}),
+        (17, {'start_time': [
+            'The artist is also booked at that time by entry 15.',
+            'The venue is also booked at that time by entry 15.',
+        ]}),
+    ]
+
+def test_validate_tour_indexes(client, booking_ids):
+    artist_id, venue_id = booking_ids
+    start = (EIGHT_PM + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+    later = (EIGHT_PM + timedelta(days=1, hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    response = client.post('/api/shows/validate', json={'shows': [
+        {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start},
+        'not a show',
+        {'artist_id': artist_id, 'venue_id': venue_id},
+        {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': later},
+        {'artist_id': artist_id, 'venue_id': 0, 'start_time': later},
+    ]})
+
+    assert response.status_code == 200
+    assert response.get_json() == {'valid': False, 'errors': [
+        {'index': 1, 'errors': {'record': ['Expected an object.']}},
+        {'index': 2, 'errors': {'start_time': ['This field is required.']}},
+        {'index': 3, 'errors': {'start_time': [
+            'The artist is also booked at that time by entry 0.',
+            'The venue is also booked at that time by entry 0.',
+        ]}},
+        {'index': 4, 'errors': {'venue_id': ['Venue not found.']}},
+    ]}
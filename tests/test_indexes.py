@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import pytest
+from benchmark import build_cases, view_scans
+
+#----------------------------------------------------------------------------#
+# Data.
+#----------------------------------------------------------------------------#
+
+# Enough rows, analyzed, for the planner to pick the plans it picks in
+# production; on a handful of rows it sorts whatever it scans first.
+VENUES = 2000
+ARTISTS = 4000
+SHOWS = 20000
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    from models import db, Venue, Artist
+    from counters import rebuild
+    from storage import ensure_partitions
+    from matches import reindex
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    with app.app_context():
+        db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+        ensure_partitions(now - timedelta(days=365), now + timedelta(days=365))
+        db.session.execute(db.text("""
+            INSERT INTO "Venue" (name, city, state, address, genres, seeking_talent)
+            SELECT CASE WHEN n % 10 = 0 THEN 'The ' ELSE '' END || 'Venue ' || n, 'City ' || n % 50, (ARRAY['NY', 'CA', 'TX', 'IL'])[n % 4 + 1],
+                n || ' Main St', ARRAY[n % 19]::smallint[], n % 3 = 0
+            FROM generate_series(1, :venues) AS n
+        """), {'venues': VENUES})
+        db.session.execute(db.text("""
+            INSERT INTO "Artist" (name, city, state, genres, seeking_venue)
+            SELECT CASE WHEN n % 10 = 0 THEN 'The ' ELSE '' END || 'Artist ' || n, 'City ' || n % 50, (ARRAY['NY', 'CA', 'TX', 'IL'])[n % 4 + 1],
+                ARRAY[n % 19]::smallint[], n % 3 = 0
+            FROM generate_series(1, :artists) AS n
+        """), {'artists': ARTISTS})
+        # Three hours apart, so no two shows overlap.
+        db.session.execute(db.text("""
+            INSERT INTO "Show" (venue_id, artist_id, start_time, duration)
+            SELECT venue.id, artist.id, CAST(:now AS timestamp) + (n - :shows / 2) * interval '3 hours', 90
+            FROM generate_series(1, :shows) AS n
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) AS position FROM "Venue") AS venue
+                ON venue.position = n % :venues + 1
+            JOIN (SELECT id, row_number() OVER (ORDER BY id) AS position FROM "Artist") AS artist
+                ON artist.position = n % :artists + 1
+        """), {'now': now, 'shows': SHOWS, 'venues': VENUES, 'artists': ARTISTS})
+        rebuild()
+        db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+        reindex(Venue)
+        reindex(Artist)
+        db.session.commit()
+        for table in ('Venue', 'Artist', 'Show', 'ShowSlot', 'VenueMatch', 'ArtistMatch'):
+            db.session.execute(db.text(f'ANALYZE "{table}"'))
+        db.session.commit()
+
+#----------------------------------------------------------------------------#
+# Query plans.
+#----------------------------------------------------------------------------#
+
+# Every SELECT a view runs, planned with sequential scans disabled, is
+# driven by an index condition (see benchmark.unindexed_scans).
+TABLES = ('Venue', 'Artist', 'Show')
+
+def test_views_use_indexes(app, client, seeded):
+    failures = []
+    for name, (method, path, data) in build_cases(app).items():
+        count, found = view_scans(app, client, method, path, data, TABLES)
+        failures += [f'{name}: {"; ".join(scans)}: {statement.splitlines()[0]}' for scans, statement in found]
+    assert failures == []
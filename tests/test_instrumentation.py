@@ -0,0 +1,30 @@
+import pytest
+from conftest import make_config
+
+#----------------------------------------------------------------------------#
+# Metrics.
+#----------------------------------------------------------------------------#
+
+TOKEN = 'metrics-token'
+
+@pytest.fixture
+def metrics_client(app):
+    from app import create_app
+    return create_app(make_config(DEBUG=False, METRICS_TOKEN=TOKEN)).test_client()
+
+def test_metrics_need_the_token(metrics_client):
+    assert metrics_client.get('/internal/metrics').status_code == 404
+    assert metrics_client.get('/internal/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 404
+
+    response = metrics_client.get('/internal/metrics', headers={'Authorization': f'Bearer {TOKEN}'})
+    assert response.status_code == 200
+    assert 'endpoints' in response.get_json()
+
+def test_metrics_off_without_token(app):
+    from app import create_app
+    client = create_app(make_config(DEBUG=False, METRICS_TOKEN=None)).test_client()
+    assert client.get('/internal/metrics', headers={'Authorization': 'Bearer '}).status_code == 404
+
+def test_server_timing_only_for_metrics_callers(metrics_client):
+    assert 'Server-Timing' not in metrics_client.get('/').headers
+    assert 'Server-Timing' in metrics_client.get('/', headers={'Authorization': f'Bearer {TOKEN}'}).headers
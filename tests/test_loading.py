@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from conftest import make_config
+
+#----------------------------------------------------------------------------#
+# Lazy loads.
+#----------------------------------------------------------------------------#
+
+def test_raise_on_lazy_load_per_app(app, add_shows):
+    from app import create_app
+    from models import db, Show
+
+    add_shows(1)
+    lenient = create_app(make_config(RAISE_ON_LAZY_LOAD=False))
+    with lenient.app_context():
+        assert db.session.query(Show).first().venue is not None
+
+    # The app made first, with the setting on, still raises.
+    with app.app_context():
+        with pytest.raises(InvalidRequestError):
+            db.session.query(Show).first().venue
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from conftest import TEST_DATABASE_URL, make_config
+
+#----------------------------------------------------------------------------#
+# Routing.
+#----------------------------------------------------------------------------#
+
+REPLICAS = ['replica_0', 'replica_1']
+
+@pytest.mark.parametrize('reads_only, primary_until, replicas', [
+    (True, None, []),
+    (False, None, REPLICAS),
+    (True, 105.0, REPLICAS),
+])
+def test_choose_bind_primary(reads_only, primary_until, replicas):
+    from replicas import choose_bind
+    assert choose_bind(reads_only, primary_until, 100.0, replicas) is None
+
+@pytest.mark.parametrize('primary_until', [None, 95.0, 100.0])
+def test_choose_bind_replica(primary_until):
+    from replicas import choose_bind
+    assert choose_bind(True, primary_until, 100.0, REPLICAS) in REPLICAS
+
+@pytest.fixture
+def replica_app(app):
+    # The test database again, under a replica key: an engine of its own,
+    # which the tests tell apart from the primary's.
+    from app import create_app
+    return create_app(make_config(SQLALCHEMY_BINDS={'replica_0': TEST_DATABASE_URL}))
+
+@pytest.fixture
+def engines_used():
+    """ The engines statements ran on while the returned list is in use:
+    `with engines_used() as engines: ...`.
+    """
+    @contextmanager
+    def record():
+        engines = []
+
+        def listener(conn, *args):
+            engines.append(conn.engine)
+
+        event.listen(Engine, 'before_cursor_execute', listener)
+        try:
+            yield engines
+        finally:
+            event.remove(Engine, 'before_cursor_execute', listener)
+    return record
+
+def test_get_bind(replica_app):
+    from models import db, Venue
+
+    with replica_app.app_context():
+        primary, replica = db.engines[None], db.engines['replica_0']
+        statements = {
+            'select': db.select(Venue),
+            'for update': db.select(Venue).with_for_update(),
+            'update': db.update(Venue).values(name='-'),
+            'insert': db.insert(Venue),
+            'text': db.text('SELECT 1'),
+        }
+        binds = {name: db.session.get_bind(clause=statement) for name, statement in statements.items()}
+        assert all(bind is primary for bind in binds.values())
+
+        db.session.info['replica'] = 'replica_0'
+        try:
+            binds = {name: db.session.get_bind(clause=statement) for name, statement in statements.items()}
+        finally:
+            db.session.info.pop('replica')
+        assert binds == {
+            'select': replica, 'for update': primary, 'update': primary, 'insert': primary, 'text': primary
+        }
+
+VENUE_FORM = {
+    'name': 'Replicated', 'city': 'New York', 'state': 'NY', 'address': '-', 'genres': 'Jazz',
+    'phone': '', 'image_link': '', 'facebook_link': '', 'website_link': '', 'seeking_description': '',
+}
+
+def test_requests_use_their_bind(replica_app, engines_used):
+    from models import db
+
+    with replica_app.app_context():
+        primary, replica = db.engines[None], db.engines['replica_0']
+    client = replica_app.test_client()
+
+    with engines_used() as engines:
+        response = client.get('/venues')
+    assert response.status_code == 200
+    assert engines and all(engine is replica for engine in engines)
+
+    with engines_used() as engines:
+        response = client.post('/venues/create', data=VENUE_FORM)
+    assert response.status_code == 302
+    assert engines and all(engine is primary for engine in engines)
+
+    # Once the client's window is over, its next read goes to the replica
+    # and clears the session key: a page a shared cache must not keep.
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+        session['primary_until'] = 0
+    with engines_used() as engines:
+        response = client.get('/artists')
+    assert engines and all(engine is replica for engine in engines)
+    assert 'Set-Cookie' in response.headers
+    assert response.cache_control.private and not response.cache_control.public
+
+#----------------------------------------------------------------------------#
+# Page cache.
+#----------------------------------------------------------------------------#
+
+def test_settled_tags():
+    from cache import Cache, LRUCache
+
+    cache = Cache()
+    cache.backend = LRUCache()
+    cache.set('page', 'first render', ['venue:1'], settled=5)
+    assert cache.get('page') == 'first render'
+
+    cache.invalidate('venue:1')
+    cache.set('page', 'replica render', ['venue:1'], settled=5)
+    assert cache.get('page') is None
+    cache.set('page', 'primary render', ['venue:1'])
+    assert cache.get('page') == 'primary render'
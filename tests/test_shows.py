@@ -0,0 +1,17 @@
+import pytest
+
+#----------------------------------------------------------------------------#
+# /shows.
+#----------------------------------------------------------------------------#
+
+# One query for the conditional GET validator, one for the page of shows
+# joined to their venues and artists, however many shows there are.
+SHOWS_QUERIES = 2
+
+@pytest.mark.parametrize('shows', [1, 30])
+def test_shows_query_count(client, add_shows, count_queries, shows):
+    add_shows(shows)
+    with count_queries() as counter:
+        response = client.get('/shows')
+    assert response.status_code == 200
+    assert counter.count == SHOWS_QUERIES
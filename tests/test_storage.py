@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+#----------------------------------------------------------------------------#
+# Partitions.
+#----------------------------------------------------------------------------#
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# create_all() in a fresh interpreter that imports models.py alone, like
+# conftest.py's, against a mock engine that prints the DDL it is sent.
+CREATE_ALL = """
+from sqlalchemy import create_mock_engine
+import models
+statements = []
+engine = create_mock_engine(
+    'postgresql://', lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)))
+)
+models.db.metadata.create_all(engine, checkfirst=False)
+print('\\n'.join(statements))
+"""
+
+def test_create_all_partitions():
+    from models import MONTHS_AHEAD, add_months, partition_name
+
+    ddl = subprocess.run(
+        [sys.executable, '-c', CREATE_ALL], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    created = {line.split('"')[1] for line in ddl.splitlines() if 'PARTITION OF "Show"' in line}
+    months = [add_months(date.today(), months) for months in range(MONTHS_AHEAD + 1)]
+    assert created == {'Show_default', *(partition_name(month) for month in months)}
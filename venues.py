@@ -0,0 +1,228 @@
+from flask import (
+    Blueprint,
+    current_app,
+    render_template,
+    request,
+    flash,
+    redirect,
+    url_for,
+    abort,
+    stream_template
+)
+from models import db, Venue
+from queries import (
+    VENUE_AREA_ORDER,
+    venue_rows,
+    venue_areas,
+    upcoming_shows,
+    past_shows,
+    detail_shows_data
+)
+from pagination import paginate
+from search import search
+from matches import reindex
+from deletes import delete, invalidate
+from cache import cache
+from replicas import read_only
+from conditional import conditional, venues_state, venue_state, touch_counterparts, bump_listings
+
+#----------------------------------------------------------------------------#
+# Blueprint.
+#----------------------------------------------------------------------------#
+
+# Forms are imported inside the views that use them; WTForms is only
+# loaded once somebody opens a form.
+bp = Blueprint('venues', __name__, url_prefix='/venues')
+
+#  Venues List
+#  ----------------------------------------------------------------
+# Streamed a row at a time, so kept out of the page cache, which would have
+# to buffer it (see Cache.page); unchanged listings are answered with 304s.
+@bp.route('')
+@conditional(venues_state)
+def venues():
+    page = paginate(venue_rows(), VENUE_AREA_ORDER)
+    return stream_template('pages/venues.html', areas=venue_areas(page.items), page=page)
+
+#  Venues Search
+#  ----------------------------------------------------------------
+@bp.route('/search', methods=['POST'])
+@read_only
+def search_venues():
+    search_term = request.form.get('search_term', '')
+    genre = request.form.get('genre')
+    response = search(Venue, search_term, genre=genre)
+
+    return render_template('pages/search_venues.html', results=response, search_term=search_term)
+
+#  Detail Venue
+#  ----------------------------------------------------------------
+@bp.route('/<int:venue_id>')
+@conditional(venue_state)
+@cache.page('venue:{venue_id}')
+def show_venue(venue_id):
+    venue = Venue.query.get_or_404(venue_id)
+
+    # Only the first few shows of each section; the rest are fetched from
+    # the JSON endpoints below as the visitor asks for them.
+    limit = current_app.config['SHOW_SECTION_SIZE']
+    upcoming = paginate(*upcoming_shows('venue', venue_id), after='', limit=limit)
+    past = paginate(*past_shows('venue', venue_id), after='', limit=limit, descending=True)
+
+    for row in upcoming.items + past.items:
+        cache.tag(f'artist:{row.artist_id}')
+
+    # object class to dict
+    data = vars(venue)
+    data['website'] = data['website_link']
+
+    data['past_shows'] = detail_shows_data(past.items, 'artist')
+    data['upcoming_shows'] = detail_shows_data(upcoming.items, 'artist')
+    data['past_shows_count'] = venue.past_shows_count
+    data['upcoming_shows_count'] = venue.upcoming_shows_count
+
+    return render_template('pages/show_venue.html', venue=data, upcoming=upcoming, past=past)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+@bp.route('/create', methods=['GET'])
+def create_venue_form():
+    from forms import VenueForm
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/create', methods=['POST'])
+def create_venue_submission():
+    from forms import VenueForm
+    form = VenueForm(request.form)
+    error = False
+
+    if form.validate() == False:
+        error = True
+    else:
+        try:
+            venue = Venue(
+                name=form.name.data,
+                city=form.city.data,
+                state=form.state.data,
+                address=form.address.data,
+                phone=form.phone.data,
+                genres=form.genres.data,
+                image_link=form.image_link.data,
+                facebook_link=form.facebook_link.data,
+                website_link=form.website_link.data,
+                seeking_talent=form.seeking_talent.data,
+                seeking_description=form.seeking_description.data
+            )
+            db.session.add(venue)
+            db.session.flush()
+            reindex(Venue, [venue.id])
+            bump_listings('venues')
+            db.session.commit()
+        except:
+            db.session.rollback()
+            error = True
+        finally:
+            db.session.close()
+
+    if error:
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+        return render_template('forms/new_venue.html', form=form)
+
+    cache.invalidate('venues')
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+    return redirect(url_for('pages.index'))
+
+#  Update Venue
+#  ----------------------------------------------------------------
+@bp.route('/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    from forms import VenueForm
+    venue = Venue.query.get_or_404(venue_id)
+
+    data = {
+        'id': venue.id,
+        'name': venue.name,
+        'city': venue.city,
+        'state': venue.state,
+        'address': venue.address,
+        'phone': venue.phone,
+        'genres': venue.genres,
+        'image_link': venue.image_link,
+        'facebook_link': venue.facebook_link,
+        'website_link': venue.website_link,
+        'seeking_talent': venue.seeking_talent,
+        'seeking_description': venue.seeking_description
+    }
+
+    form = VenueForm(formdata=None, data=data)
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    from forms import VenueForm
+    form = VenueForm(request.form)
+    error = False
+
+    venue = Venue.query.get_or_404(venue_id)
+
+    if form.validate() == False:
+        error = True
+    else:
+        try:
+            venue.name=form.name.data
+            venue.city=form.city.data
+            venue.state=form.state.data
+            venue.address=form.address.data
+            venue.phone=form.phone.data
+            venue.genres=form.genres.data
+            venue.image_link=form.image_link.data
+            venue.facebook_link=form.facebook_link.data
+            venue.website_link=form.website_link.data
+            venue.seeking_talent=form.seeking_talent.data
+            venue.seeking_description=form.seeking_description.data
+            touch_counterparts('venue', venue.id)
+            reindex(Venue, [venue.id])
+            bump_listings('venues', 'shows')
+            db.session.commit()
+        except:
+            db.session.rollback()
+            error = True
+        finally:
+            db.session.close()
+
+    if error:
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be updated.')
+        return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+    cache.invalidate(f'venue:{venue_id}', 'venues', 'shows')
+    flash('Venue ' + request.form['name'] + ' was successfully updated!')
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
+
+#  Delete Venue
+#  ----------------------------------------------------------------
+@bp.route('/<int:venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    name = db.session.query(Venue.name).filter(Venue.id == venue_id).scalar()
+    if name is None:
+        flash(f'Venue ID:{venue_id} not found.')
+        abort(404)
+
+    error = False
+    try:
+        # Set-based: no venue or show is loaded (see deletes.py).
+        artist_ids = delete(Venue, venue_id)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        error = True
+    finally:
+        db.session.close()
+
+    if error:
+        flash('An error occurred. Venue ' + name + ' could not be deleted.')
+        abort(500)
+
+    invalidate(Venue, venue_id, artist_ids)
+    flash('Venue ' + name + ' was successfully deleted!')
+    return '', 200
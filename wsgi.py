@@ -0,0 +1,19 @@
+""" WSGI entrypoint for production servers:
+
+    gunicorn wsgi:app
+
+Settings come from the environment (see config.py and gunicorn.conf.py).
+Debug mode is off unless FLASK_DEBUG=1.
+"""
+import os
+
+os.environ.setdefault('FLASK_DEBUG', '0')
+
+# Sessions (and with them flashed messages) must be readable by whichever
+# worker serves the next request.
+if not os.environ.get('SECRET_KEY'):
+    raise RuntimeError('Set SECRET_KEY: every worker must sign sessions with the same key.')
+
+from app import create_app
+
+app = create_app()